@@ -0,0 +1,83 @@
+"""Requests/sec through the SigV4 authentication middleware alone"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.auth import S3SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+from buck import stack
+from buck.api import executor, middleware
+
+ACCESS_KEY = "access_key"
+SECRET_KEY = "secret_key"
+
+
+def signed_scope(path: str = "/bucket/object"):
+    request = AWSRequest(method="GET", url=f"http://localhost{path}")
+
+    S3SigV4Auth(Credentials(ACCESS_KEY, SECRET_KEY), "s3", "us-east-1").add_auth(
+        request
+    )
+
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [
+            (key.lower().encode(), value.encode())
+            for key, value in [("host", "localhost"), *request.headers.items()]
+        ],
+    }
+
+
+async def app(scope, receive, send):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(requests: int):
+    auth_stack = stack.Stack(name="bench")
+    auth_stack.add_user(access_key=ACCESS_KEY, secret_key=SECRET_KEY)
+
+    with executor.Executor() as pool:
+        auth = middleware.AwsAuthenticationMiddleware(
+            app, stack=auth_stack, executor=pool
+        )
+
+        scope = signed_scope()
+
+        start = time.perf_counter()
+
+        for _ in range(requests):
+            await auth(dict(scope), receive, send)
+
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    elapsed = asyncio.run(run(args.requests))
+
+    print(f"{args.requests / elapsed:,.0f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""PutObject objects/sec and fsyncs/object per durability policy and writers"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.api import api
+from buck.stack.services.s3 import durability as policies
+
+fsyncs = 0
+
+
+def fsync(target, sync=policies.fsync):
+    global fsyncs
+
+    fsyncs += 1
+
+    return sync(target)
+
+
+policies.fsync = fsync
+
+
+def run(durability: str, objects: int, writers: int, data: bytes):
+    global fsyncs
+
+    fsyncs = 0
+
+    with tempfile.TemporaryDirectory(dir=os.getcwd()) as directory:
+        os.mkdir(os.path.join(directory, "bucket"))
+
+        app = api(path=directory, durability=durability)
+        stack = app.stack
+        service = stack.get_service("s3")
+
+        def put(index: int):
+            session = service.create_session(stack=stack, user=None)
+            session.put_object("bucket", f"dir{index % 16}/object{index}", data)
+
+        with concurrent.futures.ThreadPoolExecutor(writers) as executor:
+            start = time.perf_counter()
+
+            list(executor.map(put, range(objects)))
+
+            elapsed = time.perf_counter() - start
+
+    return objects / elapsed, fsyncs / objects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", nargs="+", default=list(policies.POLICIES))
+    parser.add_argument("--objects", type=int, default=1000)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--size", type=int, default=4096, help="Bytes per object")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size)
+
+    for writers in args.writers:
+        for durability in args.policies:
+            rate, synced = run(durability, args.objects, writers, data)
+
+            print(
+                f"{writers:>3} writers {durability:>12}:"
+                f" {rate:>8,.0f} objects/s {synced:>5.2f} fsyncs/object"
+            )
+
+
+if __name__ == "__main__":
+    main()
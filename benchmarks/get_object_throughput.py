@@ -0,0 +1,74 @@
+"""GetObject throughput for a range of object sizes"""
+
+import argparse
+import os
+import time
+
+import requests
+
+from server import serve
+
+SIZES = {
+    "1MB": 1024**2,
+    "100MB": 100 * 1024**2,
+    "1GB": 1024**3,
+}
+
+
+def cpu_seconds(pid: int) -> float:
+    """User + system CPU time consumed so far by process `pid` (Linux only)"""
+
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def write(path: str, size: int, block_size: int = 1024 * 1024):
+    block = os.urandom(block_size)
+
+    with open(path, "wb") as file:
+        for offset in range(0, size, block_size):
+            file.write(block[: min(block_size, size - offset)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=SIZES)
+    parser.add_argument("--total", type=float, default=2, help="GiB read per size")
+    args = parser.parse_args()
+
+    with serve() as (server, directory, url), requests.Session() as session:
+        for name in args.sizes:
+            size = SIZES[name]
+
+            write(os.path.join(directory, "bucket", name), size)
+
+            # Written behind the server's back: let it record metadata first
+            session.head(f"{url}/bucket/{name}").raise_for_status()
+
+            repeat = max(1, int(args.total * 1024**3) // size)
+            received = 0
+
+            cpu = cpu_seconds(server.pid)
+            start = time.perf_counter()
+
+            for _ in range(repeat):
+                with session.get(f"{url}/bucket/{name}", stream=True) as response:
+                    response.raise_for_status()
+
+                    for chunk in response.iter_content(1024 * 1024):
+                        received += len(chunk)
+
+            elapsed = time.perf_counter() - start
+            cpu = cpu_seconds(server.pid) - cpu
+
+            print(
+                f"{name:>6}: {repeat:>5} requests"
+                f" {received / elapsed / 1024**2:>9.1f} MiB/s"
+                f" {received / max(cpu, 1e-9) / 1024**3:>7.2f} GiB/s per server core"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""HeadObject requests/sec through the full ASGI app and the session layer"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.api import api
+
+
+async def request(app, method: str, path: str):
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+
+    return status
+
+
+async def run(app, path: str, requests: int):
+    assert await request(app, "HEAD", path) == 200
+
+    start = time.perf_counter()
+
+    for _ in range(requests):
+        await request(app, "HEAD", path)
+
+    return time.perf_counter() - start
+
+
+def run_session(app, bucket: str, key: str, requests: int):
+    stack = app.stack
+    service = stack.get_service("s3")
+
+    start = time.perf_counter()
+
+    for _ in range(requests):
+        service.create_session(stack=stack, user=None).head_object(bucket, key)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "bucket", "some", "nested"))
+
+        with open(
+            os.path.join(directory, "bucket", "some", "nested", "key"), "wb"
+        ) as file:
+            file.write(b"data")
+
+        app = api(path=directory)
+
+        elapsed = asyncio.run(run(app, "/bucket/some/nested/key", args.requests))
+        session_elapsed = run_session(app, "bucket", "some/nested/key", args.requests)
+
+    print(f"asgi:    {args.requests / elapsed:>10,.0f} requests/sec")
+    print(f"session: {args.requests / session_elapsed:>10,.0f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
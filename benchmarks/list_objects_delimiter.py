@@ -0,0 +1,88 @@
+"""Delimited listing latency over 1M keys spread across 1k folders"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.stack.services.s3 import index
+
+
+def naive(keys, prefix: str, delimiter: str, max_keys: int):
+    entries = []
+
+    for key in keys:
+        if not key.startswith(prefix):
+            continue
+
+        position = key.find(delimiter, len(prefix))
+
+        if position == -1:
+            entry = key
+        else:
+            entry = key[: position + len(delimiter)]
+
+        if not entries or entries[-1] != entry:
+            entries.append(entry)
+
+        if len(entries) > max_keys:
+            break
+
+    return entries[:max_keys]
+
+
+def timed(func, repeat: int):
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        result = func()
+
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--folders", type=int, default=1000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--max-keys", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    keys = [
+        f"folder{folder:04d}/key{key:04d}"
+        for folder in range(args.folders)
+        for key in range(args.keys)
+    ]
+
+    start = time.perf_counter()
+    key_index = index.KeyIndex(keys)
+    print(f"build:      {time.perf_counter() - start:>10.3f} s ({len(keys):,} keys)")
+
+    def scan(prefix=""):
+        return [
+            name
+            for name, _ in itertools.islice(
+                key_index.scan(prefix=prefix, delimiter="/"), args.max_keys
+            )
+        ]
+
+    skip, skip_elapsed = timed(scan, args.repeat)
+    full, full_elapsed = timed(lambda: naive(keys, "", "/", args.max_keys), args.repeat)
+
+    assert skip == full
+
+    print(f"skip-scan:  {skip_elapsed * 1000:>10.2f} ms ({len(skip):,} prefixes)")
+    print(f"full scan:  {full_elapsed * 1000:>10.2f} ms ({len(full):,} prefixes)")
+
+    prefix = f"folder{args.folders // 2:04d}/"
+
+    page, page_elapsed = timed(lambda: scan(prefix), args.repeat)
+
+    print(f"prefix:     {page_elapsed * 1000:>10.2f} ms ({len(page):,} keys)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""CompleteMultipartUpload latency and ranged GETs, concatenated vs manifest"""
+
+import argparse
+import os
+import random
+import re
+import time
+
+import requests
+
+from server import serve
+
+MODES = {
+    "concatenate": (),
+    "manifest": ("--multipart-manifests",),
+}
+
+
+def upload(session: requests.Session, url: str, parts: int, part_size: int):
+    response = session.post(f"{url}?uploads")
+    response.raise_for_status()
+
+    upload_id = re.search(r"<UploadId>(.+?)</UploadId>", response.text).group(1)
+    data = os.urandom(part_size)
+    listing = []
+
+    for part_number in range(1, parts + 1):
+        response = session.put(
+            f"{url}?uploadId={upload_id}&partNumber={part_number}", data=data
+        )
+        response.raise_for_status()
+
+        listing.append(
+            f"<Part><PartNumber>{part_number}</PartNumber>"
+            f"<ETag>{response.headers['ETag']}</ETag></Part>"
+        )
+
+    return upload_id, "".join(
+        ["<CompleteMultipartUpload>", *listing, "</CompleteMultipartUpload>"]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--parts", type=int, default=64)
+    parser.add_argument("--part-size", type=int, default=16, help="MiB per part")
+    parser.add_argument("--ranges", type=int, default=200, help="Ranged GETs")
+    args = parser.parse_args()
+
+    part_size = args.part_size * 1024**2
+    size = args.parts * part_size
+
+    for mode in args.modes:
+        with serve(*MODES[mode]) as (_, _, url), requests.Session() as session:
+            url = f"{url}/bucket/object"
+
+            upload_id, listing = upload(session, url, args.parts, part_size)
+
+            start = time.perf_counter()
+
+            session.post(f"{url}?uploadId={upload_id}", data=listing).raise_for_status()
+
+            complete = time.perf_counter() - start
+
+            start = time.perf_counter()
+
+            for _ in range(args.ranges):
+                offset = random.randrange(size - 4096)
+
+                response = session.get(
+                    url, headers={"Range": f"bytes={offset}-{offset + 4095}"}
+                )
+                response.raise_for_status()
+
+            ranged = (time.perf_counter() - start) / args.ranges
+
+            print(
+                f"{mode:>11}: {args.parts} x {args.part_size} MiB"
+                f" complete {complete * 1000:>9.1f} ms"
+                f" 4 KiB range GET {ranged * 1000:>6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
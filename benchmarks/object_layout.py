@@ -0,0 +1,70 @@
+"""PutObject and DeleteObject operations/sec per storage layout and key depth"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.api import api
+
+
+def keys(count: int, depth: int):
+    return [
+        "/".join([*(f"d{index % 7}-{level}" for level in range(depth)), f"k{index}"])
+        for index in range(count)
+    ]
+
+
+def run(layout: str, object_keys, data: bytes):
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(os.path.join(directory, "bucket"))
+
+        app = api(path=directory, layout=layout)
+        stack = app.stack
+        service = stack.get_service("s3")
+
+        def session():
+            return service.create_session(stack=stack, user=None)
+
+        start = time.perf_counter()
+
+        for key in object_keys:
+            session().put_object("bucket", key, data)
+
+        put = time.perf_counter() - start
+        start = time.perf_counter()
+
+        for key in object_keys:
+            session().delete_object("bucket", key)
+
+        delete = time.perf_counter() - start
+
+    return len(object_keys) / put, len(object_keys) / delete
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 4, 12])
+    parser.add_argument("--size", type=int, default=1024, help="Bytes per object")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size)
+
+    for depth in args.depths:
+        object_keys = keys(args.objects, depth)
+
+        for layout in ("nested", "sharded"):
+            put, delete = run(layout, object_keys, data)
+
+            print(
+                f"depth {depth:>2} {layout:>7}:"
+                f" put {put:>8,.0f}/s delete {delete:>8,.0f}/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Peak server RSS while streaming a large PutObject"""
+
+import argparse
+import os
+import threading
+import time
+
+import requests
+
+from server import serve
+
+
+def rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+
+    return 0
+
+
+def body(size: int, block_size: int = 1024 * 1024):
+    block = os.urandom(block_size)
+    sent = 0
+
+    while sent < size:
+        data = block[: min(block_size, size - sent)]
+
+        sent += len(data)
+
+        yield data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=float, default=4, help="Upload size in GiB")
+    parser.add_argument("--chunk-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    size = int(args.size * 1024**3)
+
+    with serve("--chunk-size", str(args.chunk_size)) as (server, _, url):
+        baseline = rss(server.pid)
+        peak = baseline
+        done = threading.Event()
+
+        def sample():
+            nonlocal peak
+
+            while not done.is_set():
+                peak = max(peak, rss(server.pid))
+
+                time.sleep(0.05)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+
+        start = time.perf_counter()
+
+        response = requests.put(f"{url}/bucket/object", data=body(size))
+
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        sampler.join()
+
+        response.raise_for_status()
+
+    print(f"uploaded:  {size / 1024**3:.2f} GiB in {elapsed:.1f}s")
+    print(f"rss start: {baseline / 1024**2:.1f} MiB")
+    print(f"rss peak:  {peak / 1024**2:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Ranged GetObject requests/sec and MB/s, with and without the map cache
+
+Requests are made straight to the ASGI app, so only the server's own work is
+measured: lookup, opening, reading and handing each chunk to the server.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.api import api
+
+
+async def get(app, path: str, byte_range: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"range", byte_range.encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+
+    received = 0
+    requested = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+
+        if not requested:
+            requested = True
+
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        # The response listens for a disconnect while it streams
+        await done.wait()
+
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+
+        if message["type"] == "http.response.start":
+            assert message["status"] == 206, message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+
+    return received
+
+
+async def run(map_cache: int, objects: int, size: int, requests: int, length: int):
+    with tempfile.TemporaryDirectory(dir=os.getcwd()) as directory:
+        os.mkdir(os.path.join(directory, "bucket"))
+
+        app = api(path=directory, map_cache=map_cache)
+        stack = app.stack
+        service = stack.get_service("s3")
+
+        for index in range(objects):
+            service.create_session(stack=stack, user=None).put_object(
+                "bucket", f"object{index}", os.urandom(size)
+            )
+
+        ranges = [
+            (
+                f"/bucket/object{random.randrange(objects)}",
+                f"bytes={(start := random.randrange(size - length))}-"
+                f"{start + length - 1}",
+            )
+            for _ in range(requests)
+        ]
+
+        start = time.perf_counter()
+        received = 0
+
+        for path, byte_range in ranges:
+            received += await get(app, path, byte_range)
+
+        elapsed = time.perf_counter() - start
+
+        app.executor.shutdown()
+        app.body_executor.shutdown()
+        app.upload_executor.shutdown()
+
+    return requests / elapsed, received / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=16)
+    parser.add_argument("--size", type=int, default=64 * 1024 * 1024)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--lengths", type=int, nargs="+", default=[16 * 1024, 4 * 1024 * 1024]
+    )
+    parser.add_argument("--map-cache", type=int, default=64)
+    args = parser.parse_args()
+
+    for length in args.lengths:
+        for map_cache in (0, args.map_cache):
+            rate, throughput = asyncio.run(
+                run(map_cache, args.objects, args.size, args.requests, length)
+            )
+
+            print(
+                f"{length:>8} byte ranges, map cache {map_cache:>4}:"
+                f" {rate:>7,.0f} requests/s {throughput:>8,.0f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+
+        return sock.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+@contextlib.contextmanager
+def serve(*args: str, buckets=("bucket",)):
+    """Run `python -m buck` against a temporary directory"""
+
+    port = free_port()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for bucket in buckets:
+            os.mkdir(os.path.join(directory, bucket))
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "buck", directory, "--port", str(port), *args],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        try:
+            wait_for(port)
+
+            yield server, directory, f"http://127.0.0.1:{port}"
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,103 @@
+"""PutObject and GetObject objects/sec and files on disk, with and without packing
+
+After the runs with packing, most objects are deleted and the segments
+compacted, to show the space reclaimed.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buck.api import api
+
+
+def files(directory: str) -> int:
+    return sum(len(names) for _, _, names in os.walk(directory))
+
+
+def disk_usage(directory: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(parent, name))
+        for parent, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def run(pack_size: int, objects: int, data: bytes, keep: float):
+    with tempfile.TemporaryDirectory(dir=os.getcwd()) as directory:
+        os.mkdir(os.path.join(directory, "bucket"))
+
+        app = api(path=directory, pack_size=pack_size)
+        stack = app.stack
+        service = stack.get_service("s3")
+
+        def session():
+            return service.create_session(stack=stack, user=None)
+
+        object_keys = [f"dir{index % 16}/object{index}" for index in range(objects)]
+
+        start = time.perf_counter()
+
+        for key in object_keys:
+            session().put_object("bucket", key, data)
+
+        put = objects / (time.perf_counter() - start)
+        start = time.perf_counter()
+
+        for key in object_keys:
+            with session().get_object("bucket", key) as file:
+                file.read()
+
+        get = objects / (time.perf_counter() - start)
+        count = files(directory)
+
+        if not pack_size:
+            return put, get, count, None
+
+        kept = int(objects * keep)
+
+        session().delete_objects("bucket", object_keys[kept:][:1000])
+
+        for key in object_keys[kept + 1000 :]:
+            session().delete_object("bucket", key)
+
+        segments = os.path.join(directory, ".buck", "segments")
+        before = disk_usage(segments)
+
+        # The active segment is never compacted
+        service.segments.seal()
+        service.compactor.compact()
+
+        return put, get, count, (before, disk_usage(segments))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=4096, help="Bytes per object")
+    parser.add_argument("--pack-size", type=int, default=65536)
+    parser.add_argument("--keep", type=float, default=0.1, help="Share not deleted")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size)
+
+    for pack_size in (0, args.pack_size):
+        put, get, count, compacted = run(pack_size, args.objects, data, args.keep)
+
+        print(
+            f"pack size {pack_size:>6}: put {put:>8,.0f}/s get {get:>8,.0f}/s"
+            f" {count:>6} files"
+        )
+
+        if compacted is not None:
+            before, after = compacted
+
+            print(f"  compaction: {before:,} bytes of segments down to {after:,}")
+
+
+if __name__ == "__main__":
+    main()
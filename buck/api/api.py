@@ -1,5 +1,6 @@
 from . import router
 from . import middleware
+from . import executor
 from .. import stack
 from ..stack import services
 
@@ -9,21 +10,66 @@ import uvicorn
 
 
 class Api(fastapi.FastAPI):
-    def __init__(self, *, anonymous: bool = False, path: str = None):
+    def __init__(
+        self,
+        *,
+        anonymous: bool = False,
+        path: str = None,
+        chunk_size: int = None,
+        io_threads: int = None,
+        multipart_manifests: bool = False,
+        layout: str = None,
+        durability: str = None,
+        pack_size: int = 0,
+        map_cache: int = 0,
+    ):
         super().__init__()
 
+        self.executor = executor.Executor(max_workers=io_threads)
+
+        # Storage threads block reading request bodies, so authenticating and
+        # decoding those bodies on the same threads can deadlock under load
+        self.body_executor = executor.Executor(
+            max_workers=io_threads, thread_name_prefix="buck-body"
+        )
+
+        # Uploads hold their thread while the client sends the body, however
+        # slowly, so they get their own threads rather than starve reads
+        self.upload_executor = executor.Executor(
+            max_workers=io_threads, thread_name_prefix="buck-upload"
+        )
+
+        self.add_event_handler("shutdown", self.executor.shutdown)
+        self.add_event_handler("shutdown", self.body_executor.shutdown)
+        self.add_event_handler("shutdown", self.upload_executor.shutdown)
+
         self.stack = stack.Stack(
             name="buck",
             anonymous_access=anonymous,
         )
 
-        self.stack.add_service(services.SimpleStorageService(path))
+        storage = services.SimpleStorageService(
+            path,
+            chunk_size=chunk_size,
+            multipart_manifests=multipart_manifests,
+            layout=layout,
+            durability=durability,
+            pack_size=pack_size,
+            map_cache=map_cache,
+        )
+
+        if storage.compactor is not None:
+            self.add_event_handler("startup", storage.compactor.start)
+            self.add_event_handler("shutdown", storage.compactor.stop)
+
+        self.stack.add_service(storage)
 
         self.include_router(router.router)
 
         self.add_middleware(
             middleware.AwsAuthenticationMiddleware,
             stack=self.stack,
+            executor=self.body_executor,
         )
 
         self.add_middleware(middleware.AwsExceptionHandlerMiddleware)
@@ -1,8 +1,27 @@
+from ..stack import exceptions
+
 import re
 import hashlib
 import hmac
 import urllib.parse
 import collections
+import datetime
+import functools
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+STREAMING_PAYLOAD = "STREAMING-AWS4-HMAC-SHA256-PAYLOAD"
+STREAMING_UNSIGNED_PAYLOAD_TRAILER = "STREAMING-UNSIGNED-PAYLOAD-TRAILER"
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+SIGNING_KEY_CACHE_SIZE = 1024
+
+AUTHORIZATION_PATTERN = re.compile(
+    r"(?P<algorithm>.+)(?: +)Credential(?: *)=(?: *)(?P<credential>.*)(?: *),(?: *)SignedHeaders(?: *)=(?: *)(?P<signed_headers>.+)(?: *),(?: *)Signature(?: *)=(?: *)(?P<signature>.+)"
+)
+CREDENTIAL_SEPARATOR = re.compile(r"(?: *)/(?: *)")
+SIGNED_HEADERS_SEPARATOR = re.compile(r"(?: *);(?: *)")
+PAYLOAD_HASH_PATTERN = re.compile(r"[0-9a-f]{64}")
+DECIMAL_PATTERN = re.compile(r"[0-9]+")
+HEX_PATTERN = re.compile(r"[0-9a-fA-F]+")
 
 
 class AwsSignatureV4(object):
@@ -10,9 +29,7 @@ class AwsSignatureV4(object):
     def parse_authorization(authorization):
         authorization = authorization.strip()
 
-        pattern = r"(?P<algorithm>.+)(?: +)Credential(?: *)=(?: *)(?P<credential>.*)(?: *),(?: *)SignedHeaders(?: *)=(?: *)(?P<signed_headers>.+)(?: *),(?: *)Signature(?: *)=(?: *)(?P<signature>.+)"
-
-        match = re.match(pattern, authorization)
+        match = AUTHORIZATION_PATTERN.match(authorization)
 
         if not match:
             return
@@ -22,14 +39,14 @@ class AwsSignatureV4(object):
         signed_headers = match.group("signed_headers")
         signature = match.group("signature")
 
-        credential_scope = re.split(r"(?: *)/(?: *)", credential)
+        credential_scope = CREDENTIAL_SEPARATOR.split(credential)
 
         if len(credential_scope) != 5:
             return
 
         access_key, date, aws_region, aws_service, aws_request = credential_scope
 
-        signed_headers_list = re.split(r"(?: *);(?: *)", signed_headers)
+        signed_headers_list = SIGNED_HEADERS_SEPARATOR.split(signed_headers)
 
         authorization_data = {
             "algorithm": algorithm,
@@ -51,6 +68,7 @@ class AwsSignatureV4(object):
         return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
 
     @classmethod
+    @functools.lru_cache(maxsize=SIGNING_KEY_CACHE_SIZE)
     def _get_signature_key(cls, *, secret_key, date_stamp, region, service, request):
         key_date = cls._sign(f"AWS4{secret_key}".encode("utf-8"), date_stamp)
         key_region = cls._sign(key_date, region)
@@ -73,6 +91,7 @@ class AwsSignatureV4(object):
         parameters={},
         headers={},
         body="",
+        payload_hash=None,
         method="GET",
         uri="/",
     ):
@@ -85,7 +104,9 @@ class AwsSignatureV4(object):
         canonical_querystring = urllib.parse.urlencode(
             collections.OrderedDict(
                 sorted(parameters.items(), key=lambda item: item[0])
-            )
+            ),
+            quote_via=urllib.parse.quote,
+            safe="-_.~",
         )
 
         formatted_headers = {key.lower(): headers.get(key).strip() for key in headers}
@@ -100,7 +121,8 @@ class AwsSignatureV4(object):
 
         signed_headers = ";".join(ordered_headers.keys())
 
-        payload_hash = hashlib.sha256((body).encode("utf-8")).hexdigest()
+        if payload_hash is None:
+            payload_hash = hashlib.sha256((body).encode("utf-8")).hexdigest()
 
         canonical_request = "\n".join(
             (
@@ -145,6 +167,31 @@ class AwsSignatureV4(object):
 
         return signature
 
+    @staticmethod
+    def create_chunk_signature(
+        *,
+        signing_key,
+        amz_date,
+        credential_scope,
+        previous_signature,
+        chunk_hash,
+        algorithm="AWS4-HMAC-SHA256-PAYLOAD",
+    ):
+        string_to_sign = "\n".join(
+            (
+                algorithm,
+                amz_date,
+                credential_scope,
+                previous_signature,
+                EMPTY_PAYLOAD_HASH,
+                chunk_hash,
+            )
+        )
+
+        return hmac.new(
+            signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+
     @staticmethod
     def create_authorization(
         *,
@@ -171,3 +218,197 @@ class AwsSignatureV4(object):
         signed_headers = ";".join(signed_headers)
 
         return f"{algorithm} Credential={credential}, SignedHeaders={signed_headers}, Signature={signature}"
+
+
+class AwsChunkedDecoder(object):
+    """Incrementally decodes an aws-chunked body
+
+    Given the request's seed signature (and what it was signed with), each
+    chunk signature is verified; without one, the body is unsigned and any
+    chunk signatures are ignored. With `trailer`, header lines may follow
+    the final chunk, and are collected in `trailers`.
+    """
+
+    max_header_size = 4096
+    max_trailers = 16
+
+    def __init__(
+        self,
+        *,
+        secret_key=None,
+        date=None,
+        region=None,
+        service=None,
+        request=None,
+        seed_signature=None,
+        decoded_content_length=None,
+        trailer=False,
+    ):
+        self.signed = seed_signature is not None
+
+        if self.signed:
+            date_stamp = date.strftime("%Y%m%d")
+
+            self.signing_key = AwsSignatureV4._get_signature_key(
+                secret_key=secret_key,
+                date_stamp=date_stamp,
+                region=region,
+                service=service,
+                request=request,
+            )
+            self.amz_date = date.strftime("%Y%m%dT%H%M%SZ")
+            self.credential_scope = "/".join((date_stamp, region, service, request))
+
+        self.previous_signature = seed_signature
+        self.decoded_content_length = decoded_content_length
+        self.trailer = trailer
+        self.trailers = {}
+
+        self.buffer = bytearray()
+        self.state = "header"
+        self.remaining = 0
+        self.signature = None
+        self.hasher = None
+        self.decoded = 0
+
+    @property
+    def finished(self):
+        return self.state == "finished"
+
+    def _verify(self):
+        if not self.signed:
+            return
+
+        signature = AwsSignatureV4.create_chunk_signature(
+            signing_key=self.signing_key,
+            amz_date=self.amz_date,
+            credential_scope=self.credential_scope,
+            previous_signature=self.previous_signature,
+            chunk_hash=self.hasher.hexdigest(),
+        )
+
+        if not hmac.compare_digest(signature, self.signature):
+            raise exceptions.S3Error("SignatureDoesNotMatch")
+
+        self.previous_signature = signature
+
+    def _read_header(self):
+        index = self.buffer.find(b"\r\n")
+
+        if index == -1:
+            if len(self.buffer) > self.max_header_size:
+                raise exceptions.S3Error("IncompleteBody")
+
+            return False
+
+        header = bytes(self.buffer[:index]).decode("ascii", "replace")
+
+        del self.buffer[: index + 2]
+
+        size, _, extension = header.partition(";")
+        name, _, signature = extension.partition("=")
+
+        if self.signed and name.strip() != "chunk-signature":
+            raise exceptions.S3Error("IncompleteBody")
+
+        if not HEX_PATTERN.fullmatch(size.strip()):
+            raise exceptions.S3Error("IncompleteBody")
+
+        self.remaining = int(size, 16)
+        self.signature = signature.strip()
+        self.hasher = hashlib.sha256() if self.signed else None
+        self.state = "data" if self.remaining else "trailer"
+
+        return True
+
+    def _read_trailer(self):
+        index = self.buffer.find(b"\r\n")
+
+        if index == -1:
+            if len(self.buffer) > self.max_header_size:
+                raise exceptions.S3Error("IncompleteBody")
+
+            return False
+
+        line = bytes(self.buffer[:index]).decode("ascii", "replace")
+        name, separator, value = line.partition(":")
+
+        if not separator or len(self.trailers) >= self.max_trailers:
+            raise exceptions.S3Error("IncompleteBody")
+
+        del self.buffer[: index + 2]
+
+        self.trailers[name.strip().lower()] = value.strip()
+
+        return True
+
+    def _read_delimiter(self):
+        if len(self.buffer) < 2:
+            return False
+
+        if self.buffer[:2] != b"\r\n":
+            # Trailing headers come between the final chunk and its delimiter
+            if self.state == "trailer" and self.trailer:
+                return self._read_trailer()
+
+            raise exceptions.S3Error("IncompleteBody")
+
+        del self.buffer[:2]
+
+        self._verify()
+
+        if self.state == "trailer":
+            self.state = "finished"
+        else:
+            self.state = "header"
+
+        return True
+
+    def feed(self, data: bytes) -> bytes:
+        if self.finished:
+            if data:
+                raise exceptions.S3Error("IncompleteBody")
+
+            return b""
+
+        self.buffer += data
+
+        output = bytearray()
+
+        while not self.finished:
+            if self.state == "header":
+                if not self._read_header():
+                    break
+            elif self.state == "data":
+                if not self.buffer:
+                    break
+
+                chunk = self.buffer[: self.remaining]
+
+                del self.buffer[: len(chunk)]
+
+                if self.hasher is not None:
+                    self.hasher.update(chunk)
+
+                output += chunk
+
+                self.remaining -= len(chunk)
+
+                if not self.remaining:
+                    self.state = "delimiter"
+            elif not self._read_delimiter():
+                break
+
+        self.decoded += len(output)
+
+        return bytes(output)
+
+    def close(self):
+        if not self.finished or self.buffer:
+            raise exceptions.S3Error("IncompleteBody")
+
+        if (
+            self.decoded_content_length is not None
+            and self.decoded != self.decoded_content_length
+        ):
+            raise exceptions.S3Error("IncompleteBody")
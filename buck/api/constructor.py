@@ -1,10 +1,27 @@
 from .api import Api
 
 
-def api(path: str = None, auth: tuple = ()):
+def api(
+    path: str = None,
+    auth: tuple = (),
+    chunk_size: int = None,
+    io_threads: int = None,
+    multipart_manifests: bool = False,
+    layout: str = None,
+    durability: str = None,
+    pack_size: int = 0,
+    map_cache: int = 0,
+):
     app: Api = Api(
         anonymous=not auth,
         path=path,
+        chunk_size=chunk_size,
+        io_threads=io_threads,
+        multipart_manifests=multipart_manifests,
+        layout=layout,
+        durability=durability,
+        pack_size=pack_size,
+        map_cache=map_cache,
     )
 
     for access_key, secret_key in auth:
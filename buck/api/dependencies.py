@@ -1,10 +1,16 @@
+from ..stack import exceptions
+
 import fastapi
+import xml.parsers.expat
 import xmltodict
 import requests.structures
 
 
 async def payload(request: fastapi.Request):
-    return xmltodict.parse(await request.body())
+    try:
+        return xmltodict.parse(await request.body())
+    except xml.parsers.expat.ExpatError:
+        raise exceptions.S3Error("MalformedXML")
 
 
 def state(attr: str, default=None):
@@ -71,6 +77,14 @@ def stack(request: fastapi.Request):
     return attr("stack")(request)
 
 
+def executor(request: fastapi.Request):
+    return attr("executor")(request)
+
+
+def upload_executor(request: fastapi.Request):
+    return attr("upload_executor")(request)
+
+
 def service(name):
     def wrapper(request: fastapi.Request):
         return stack(request).get_service(name)
@@ -0,0 +1,18 @@
+import asyncio
+import concurrent.futures
+import functools
+
+
+class Executor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self, max_workers: int = None, thread_name_prefix: str = "buck-io"):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: max_workers={self._max_workers}>"
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(
+            self, functools.partial(func, *args, **kwargs)
+        )
@@ -1,19 +1,57 @@
 from . import responses
+from . import streams
 from . import aws
 from ..stack import exceptions
 
-import starlette.middleware.base
+import starlette.requests
 import urllib.parse
 import datetime
 
 
-class AwsExceptionHandlerMiddleware(starlette.middleware.base.BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        exception = None
+class AwsExceptionHandlerMiddleware(object):
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+
+            return
+
+        headers = dict(scope["headers"])
+
+        response_started = False
+        request_complete = (
+            headers.get(b"content-length", b"0") == b"0"
+            and b"transfer-encoding" not in headers
+        )
+
+        async def receive_wrapper():
+            nonlocal request_complete
+
+            message = await receive()
+
+            if not message.get("more_body", False):
+                request_complete = True
+
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_started
+
+            if message["type"] == "http.response.start":
+                response_started = True
+
+            await send(message)
 
         try:
-            return await call_next(request)
+            await self.app(scope, receive_wrapper, send_wrapper)
+
+            return
         except exceptions.S3Error as error:
+            if response_started:
+                raise
+
             exception = error
         except Exception as error:
             exception = exceptions.S3Error("InternalError")
@@ -30,31 +68,79 @@ class AwsExceptionHandlerMiddleware(starlette.middleware.base.BaseHTTPMiddleware
             "message": exception.description,
         }
 
-        return responses.AwsErrorResponse(error, status_code=status_code)
+        response = responses.AwsErrorResponse(error, status_code=status_code)
 
+        # An unread request body would be parsed as the next request
+        if not request_complete:
+            response.headers["Connection"] = "close"
 
-class BaseAwsAuthenticationSignatureMiddleware(
-    starlette.middleware.base.BaseHTTPMiddleware
-):
-    def __init__(self, app, *, stack):
-        super().__init__(app)
+        await response(scope, receive, send)
 
+
+class BaseAwsAuthenticationSignatureMiddleware(object):
+    def __init__(self, app, *, stack, executor):
+        self.app = app
         self.stack = stack
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+
+            return
+
+        receive = await self.authenticate(starlette.requests.Request(scope, receive))
+
+        await self.app(scope, receive, send)
+
+    async def authenticate(self, request):
+        return request.receive
+
+    @staticmethod
+    def is_chunked(headers) -> bool:
+        encodings = headers.get("Content-Encoding", "").split(",")
+
+        return any(encoding.strip().lower() == "aws-chunked" for encoding in encodings)
+
+    def decoded(self, headers, receive, **signing):
+        """Decodes an aws-chunked body, verifying its chunks if given a signature"""
+
+        decoded_content_length = headers.get("X-Amz-Decoded-Content-Length")
+
+        if decoded_content_length is not None:
+            if not aws.DECIMAL_PATTERN.fullmatch(decoded_content_length):
+                raise exceptions.S3Error("InvalidArgument")
+
+            decoded_content_length = int(decoded_content_length)
+
+        decoder = aws.AwsChunkedDecoder(
+            decoded_content_length=decoded_content_length,
+            trailer="X-Amz-Trailer" in headers,
+            **signing,
+        )
+
+        return streams.decoded(receive, decoder, self.executor)
 
 
 class AwsAuthenticationSignatureV2Middleware(BaseAwsAuthenticationSignatureMiddleware):
-    async def dispatch(self, request, call_next):
+    async def authenticate(self, request):
         raise exceptions.S3Error("InvalidEncryptionAlgorithmError")
 
 
 class AwsAuthenticationSignatureV4Middleware(BaseAwsAuthenticationSignatureMiddleware):
     @staticmethod
-    async def parse_request(request):
-        uri = request.scope["path"]
+    def parse_request(request):
+        # The canonical URI is the path as the client encoded it
+        raw_path = request.scope.get("raw_path")
+        uri = (
+            raw_path.decode("latin-1")
+            if raw_path
+            else urllib.parse.quote(request.scope["path"], safe="/~")
+        )
         method = request.scope["method"].upper()
         query_string = request.scope["query_string"].decode().strip()
 
-        parameters = dict(urllib.parse.parse_qsl(query_string))
+        parameters = dict(urllib.parse.parse_qsl(query_string, keep_blank_values=True))
 
         amz_date = request.headers.get("X-Amz-Date")
 
@@ -65,18 +151,28 @@ class AwsAuthenticationSignatureV4Middleware(BaseAwsAuthenticationSignatureMiddl
 
         date = datetime.datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ")
 
-        body = (await request.body()).decode()
+        payload_hash = request.headers.get("X-Amz-Content-SHA256")
+
+        if payload_hash is None:
+            raise exceptions.S3Error("MissingSecurityHeader")
+
+        if payload_hash not in (
+            aws.UNSIGNED_PAYLOAD,
+            aws.STREAMING_PAYLOAD,
+            aws.STREAMING_UNSIGNED_PAYLOAD_TRAILER,
+        ) and not aws.PAYLOAD_HASH_PATTERN.fullmatch(payload_hash):
+            raise exceptions.S3Error("InvalidArgument")
 
         return {
             "date": date,
             "parameters": parameters,
             "headers": headers,
-            "body": body,
+            "payload_hash": payload_hash,
             "uri": uri,
             "method": method,
         }
 
-    async def dispatch(self, request, call_next):
+    async def authenticate(self, request):
         signer = aws.AwsSignatureV4()
 
         authorization = request.headers.get("Authorization")
@@ -89,20 +185,24 @@ class AwsAuthenticationSignatureV4Middleware(BaseAwsAuthenticationSignatureMiddl
         if auth is None:
             raise exceptions.S3Error("AuthorizationHeaderMalformed")
 
-        data = await self.parse_request(request)
+        data = self.parse_request(request)
 
         if data is None:
             raise exceptions.S3Error("InvalidArgument")
 
-        for header_name in tuple(data["headers"]):
-            for signed_header_name in auth["signed_headers"]:
-                if header_name.lower() == signed_header_name:
-                    break
-            else:
-                data["headers"].pop(header_name)
+        signed_headers = frozenset(auth["signed_headers"])
+
+        data["headers"] = {
+            header_name: header_value
+            for header_name, header_value in data["headers"].items()
+            if header_name.lower() in signed_headers
+        }
 
         user = self.stack.get_user(auth["credential"]["access_key"])
 
+        if user is None:
+            raise exceptions.S3Error("InvalidAccessKeyId")
+
         signature = signer.create_signature(
             access_key=auth["credential"]["access_key"],
             secret_key=user.secret_key,
@@ -113,7 +213,7 @@ class AwsAuthenticationSignatureV4Middleware(BaseAwsAuthenticationSignatureMiddl
             algorithm=auth["algorithm"],
             parameters=data["parameters"],
             headers=data["headers"],
-            body=data["body"],
+            payload_hash=data["payload_hash"],
             method=data["method"],
             uri=data["uri"],
         )
@@ -124,17 +224,55 @@ class AwsAuthenticationSignatureV4Middleware(BaseAwsAuthenticationSignatureMiddl
 
         request.state.user = user
 
-        response = await call_next(request)
+        payload_hash = data["payload_hash"]
+        receive = request.receive
+
+        if aws.PAYLOAD_HASH_PATTERN.fullmatch(payload_hash):
+            receive = streams.verified(receive, payload_hash, self.executor)
+
+        if payload_hash == aws.STREAMING_PAYLOAD:
+            return self.decoded(
+                request.headers,
+                receive,
+                secret_key=user.secret_key,
+                date=data["date"],
+                region=auth["credential"]["region"],
+                service=auth["credential"]["service"],
+                request=auth["credential"]["request"],
+                seed_signature=auth["signature"],
+            )
+
+        unsigned_chunks = payload_hash == aws.STREAMING_UNSIGNED_PAYLOAD_TRAILER
+
+        if unsigned_chunks or self.is_chunked(request.headers):
+            return self.decoded(request.headers, receive)
 
-        return response
+        return receive
 
 
 class AwsAuthenticationMiddleware(BaseAwsAuthenticationSignatureMiddleware):
-    async def dispatch(self, request, call_next):
+    def __init__(self, app, *, stack, executor):
+        super().__init__(app, stack=stack, executor=executor)
+
+        self.middleware = {
+            "AWS": AwsAuthenticationSignatureV2Middleware(
+                app, stack=stack, executor=executor
+            ),
+            "AWS4": AwsAuthenticationSignatureV4Middleware(
+                app, stack=stack, executor=executor
+            ),
+        }
+
+    async def authenticate(self, request):
         if self.stack.anonymous_access:
             request.state.user = None
 
-            return await call_next(request)
+            # Chunk signatures can't be checked without a user, but the
+            # chunks must still be decoded
+            if self.is_chunked(request.headers):
+                return self.decoded(request.headers, request.receive)
+
+            return request.receive
 
         authorization = request.headers.get("Authorization")
 
@@ -145,14 +283,7 @@ class AwsAuthenticationMiddleware(BaseAwsAuthenticationSignatureMiddleware):
 
         algorithm_version = algorithm.split("-", 1)[0]
 
-        middleware = {
-            "AWS": AwsAuthenticationSignatureV2Middleware,
-            "AWS4": AwsAuthenticationSignatureV4Middleware,
-        }
-
-        if algorithm_version not in middleware:
+        if algorithm_version not in self.middleware:
             raise exceptions.S3Error("InvalidEncryptionAlgorithmError")
 
-        return await middleware[algorithm_version](self.app, stack=self.stack).dispatch(
-            request, call_next
-        )
+        return await self.middleware[algorithm_version].authenticate(request)
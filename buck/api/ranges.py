@@ -0,0 +1,66 @@
+import re
+from typing import List, Optional, Tuple
+
+# Beyond this many ranges the Range header is ignored and the whole object sent
+MAX_RANGES = 128
+
+DIGITS_PATTERN = re.compile(r"[0-9]+")
+
+
+def parse(value: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parses an RFC 7233 Range header into sorted, coalesced (start, end) pairs
+
+    `end` is inclusive. Returns None when the header should be ignored (an
+    unknown unit or invalid syntax) and an empty list when no range can be
+    satisfied.
+    """
+
+    unit, _, specifiers = value.partition("=")
+
+    if unit.strip().lower() != "bytes":
+        return
+
+    ranges = []
+
+    for specifier in specifiers.split(","):
+        first, separator, last = specifier.strip().partition("-")
+
+        if not separator or not DIGITS_PATTERN.fullmatch(first + last):
+            return
+
+        if not first:
+            # Suffix range: the final `last` bytes, of which an empty object
+            # has none
+            if int(last) == 0 or not size:
+                continue
+
+            ranges.append((max(0, size - int(last)), size - 1))
+
+            continue
+
+        if last and int(last) < int(first):
+            return
+
+        if int(first) >= size:
+            continue
+
+        ranges.append((int(first), min(int(last), size - 1) if last else size - 1))
+
+    if len(ranges) > MAX_RANGES:
+        return
+
+    return coalesce(ranges)
+
+
+def coalesce(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merges overlapping and adjacent ranges"""
+
+    merged = []
+
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
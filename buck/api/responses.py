@@ -1,11 +1,22 @@
+from . import ranges
+from ..stack import exceptions
+from ..stack.services.s3 import files
+
+import starlette.concurrency
 import starlette.responses
 import starlette.requests
+import anyio
+import asyncio
+import functools
 import mimetypes
+import mmap
 import xmltodict
-import magic
 import os
-from typing import IO, Generator
-import io
+import secrets
+from typing import IO, Optional
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+DEFAULT_PART_TYPE = "binary/octet-stream"
 
 
 class Response(starlette.responses.Response):
@@ -13,8 +24,8 @@ class Response(starlette.responses.Response):
 
 
 class StatusResponse(starlette.responses.Response):
-    def __init__(self, **kwargs):
-        status_code = kwargs.get("content")
+    def __init__(self, content: int = None, **kwargs):
+        status_code = kwargs.get("content", content)
 
         super().__init__(status_code=status_code)
 
@@ -23,8 +34,8 @@ class StatusResponse(starlette.responses.Response):
 
 
 class RedirectResponse(starlette.responses.RedirectResponse):
-    def __init__(self, **kwargs):
-        url = kwargs.get("content")
+    def __init__(self, content: str = None, **kwargs):
+        url = kwargs.get("content", content)
 
         super().__init__(url, status_code=307)
 
@@ -33,49 +44,100 @@ class RedirectResponse(starlette.responses.RedirectResponse):
 
 
 class RangedStreamingResponse(starlette.responses.StreamingResponse):
-    chunk_size = 8192
-
-    def __init__(self, request: starlette.requests.Request, file: IO[bytes], **kwargs):
-        if "media_type" not in kwargs:
-            kwargs["media_type"] = magic.from_buffer(file.read(2048), mime=True)
+    """Streams an object, one byte range of it, or several as multipart/byteranges
 
-            file.seek(0)
+    Servers offering the ``http.response.zerocopysend`` extension are handed
+    the file descriptor and ranges to send themselves. Otherwise each range is
+    read in large chunks off the event loop, reading the next chunk while the
+    current one is being sent. Nothing is buffered beyond one chunk.
 
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0, os.SEEK_SET)
+    Files made of several others (multipart manifests) are sent from the
+    underlying part files, range by range. Memory-mapped files are sent as
+    slices of the map, faulted in off the event loop, without copying them.
+    """
 
-        content_range = request.headers.get("range")
+    chunk_size = 1024 * 1024
 
-        content_length = file_size
-        status_code = 200
-        headers = {}
+    def __init__(
+        self,
+        request: starlette.requests.Request,
+        file: IO[bytes],
+        size: int = None,
+        ranged: bool = True,
+        executor=None,
+        chunk_size: int = None,
+        **kwargs,
+    ):
+        if size is None:
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            file.seek(0, os.SEEK_SET)
+
+        # A failed If-Range validator means the whole (changed) object is sent
+        content_range = request.headers.get("range") if ranged else None
+
+        byte_ranges = None
 
         if content_range is not None:
-            content_range = content_range.strip().lower()
+            byte_ranges = ranges.parse(content_range, size)
 
-            content_ranges = content_range.split("=")[-1]
+            if byte_ranges == []:
+                file.close()
 
-            range_start, range_end, *_ = map(
-                str.strip, (content_ranges + "-").split("-")
-            )
+                raise exceptions.S3Error("InvalidRange")
 
-            range_start = max(0, int(range_start)) if range_start else 0
-            range_end = (
-                min(file_size - 1, int(range_end)) if range_end else file_size - 1
-            )
-
-            content_length = (range_end - range_start) + 1
+        headers = {}
 
-            file = self.ranged(file, start=range_start, end=range_end + 1)
+        if byte_ranges is None:
+            status_code = 200
+            parts = [(b"", 0, size)]
+            trailer = b""
+        elif len(byte_ranges) == 1:
+            (start, end) = byte_ranges[0]
 
             status_code = 206
+            parts = [(b"", start, end - start + 1)]
+            trailer = b""
+
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            boundary = secrets.token_hex(16)
+            content_type = kwargs.get("headers", {}).get(
+                "Content-Type", DEFAULT_PART_TYPE
+            )
 
-            headers["Content-Range"] = f"bytes {range_start}-{range_end}/{file_size}"
+            status_code = 206
+            parts = [
+                (
+                    (
+                        f"\r\n--{boundary}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                    ).encode("latin-1"),
+                    start,
+                    end - start + 1,
+                )
+                for start, end in byte_ranges
+            ]
+            trailer = f"\r\n--{boundary}--\r\n".encode()
+
+            headers["Content-Type"] = f"multipart/byteranges; boundary={boundary}"
+
+        content_length = len(trailer) + sum(
+            len(header) + count for header, _, count in parts
+        )
 
         kwargs["status_code"] = status_code
 
-        super().__init__(file, **kwargs)
+        # The body is sent from `file` by stream_response, not an iterator
+        super().__init__((), **kwargs)
+
+        self.file = file
+        self.parts = parts
+        self.trailer = trailer
+        self.run = executor.run if executor else starlette.concurrency.run_in_threadpool
+        self.chunk_size = chunk_size or self.chunk_size
+        self.zerocopy = False
 
         self.headers.update(
             {
@@ -85,43 +147,154 @@ class RangedStreamingResponse(starlette.responses.StreamingResponse):
             }
         )
 
-    @staticmethod
-    def ranged(
-        file: IO[bytes],
-        start: int = 0,
-        end: int = None,
-        block_size: int = 8192,
-    ) -> Generator[bytes, None, None]:
-        consumed = 0
+    async def __call__(self, scope, receive, send):
+        self.zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.file.close()
+
+    async def stream_response(self, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+
+        for header, offset, count in self.parts:
+            if header:
+                await send(
+                    {"type": "http.response.body", "body": header, "more_body": True}
+                )
+
+            if not count:
+                continue
+
+            for file, file_offset, file_count in slices(self.file, offset, count):
+                if self.zerocopy and files.fileno(file) is not None:
+                    await send(
+                        {
+                            "type": ZEROCOPY_EXTENSION,
+                            "file": file,
+                            "offset": file_offset,
+                            "count": file_count,
+                            "more_body": True,
+                        }
+                    )
+                elif hasattr(file, "view"):
+                    await self.stream_view(send, file.view(file_offset, file_count))
+                else:
+                    await self.stream_range(send, file, file_offset, file_count)
+
+        await send({"type": "http.response.body", "body": self.trailer})
+
+    async def stream_range(self, send, file: IO[bytes], offset: int, count: int):
+        reader = functools.partial(read, file, files.fileno(file))
+
+        def prefetch(offset: int, remaining: int):
+            return asyncio.ensure_future(
+                self.run(reader, offset, min(self.chunk_size, remaining))
+            )
 
-        file.seek(start)
+        remaining = count
+        pending = prefetch(offset, remaining)
 
-        while True:
-            data_length = min(block_size, end - start - consumed) if end else block_size
+        try:
+            while pending is not None:
+                chunk = await pending
 
-            if data_length <= 0:
-                break
+                pending = None
 
-            data = file.read(data_length)
+                if not chunk:
+                    break
 
-            if not data:
-                break
+                offset += len(chunk)
+                remaining -= len(chunk)
 
-            consumed += data_length
+                if remaining > 0:
+                    pending = prefetch(offset, remaining)
 
-            yield data
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        finally:
+            # Never let the file be closed under an in-flight read
+            if pending is not None:
+                with anyio.CancelScope(shield=True):
+                    await asyncio.wait((pending,))
 
-        if hasattr(file, "close"):
-            file.close()
+    async def stream_view(self, send, view: memoryview):
+        def prefetch(offset: int):
+            return asyncio.ensure_future(
+                self.run(fault_in, view[offset : offset + self.chunk_size])
+            )
+
+        offset = 0
+        pending = prefetch(offset)
+
+        try:
+            while pending is not None:
+                chunk = await pending
+
+                pending = None
+
+                if not chunk:
+                    break
+
+                offset += len(chunk)
+
+                if offset < len(view):
+                    pending = prefetch(offset)
+
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        finally:
+            if pending is not None:
+                with anyio.CancelScope(shield=True):
+                    await asyncio.wait((pending,))
+
+
+def slices(file: IO[bytes], offset: int, count: int):
+    """Yields the (file, offset, count) runs actually holding a byte range"""
+
+    if hasattr(file, "slices"):
+        yield from file.slices(offset, count)
+    else:
+        yield file, offset, count
+
+
+def read(file: IO[bytes], fd: Optional[int], offset: int, size: int) -> bytes:
+    """Reads `size` bytes at `offset` into a fresh buffer (one copy, no seek)"""
+
+    if fd is not None:
+        return os.pread(fd, size, offset)
+
+    file.seek(offset)
+
+    return file.read(size)
+
+
+def fault_in(view: memoryview) -> memoryview:
+    """Touches a page of `view` at a time, so sending it won't wait on the disk"""
+
+    view[:: mmap.PAGESIZE].tobytes()
+
+    return view
 
 
 class AwsResponse(starlette.responses.Response):
     media_type = mimetypes.types_map[".xml"]
+    namespace = "http://s3.amazonaws.com/doc/2006-03-01/"
 
     def render(self, content: dict) -> bytes:
         root_node = next(iter(content))
 
-        content[root_node]["@xmlns"] = "http://s3.amazonaws.com/doc/2006-03-01/"
+        if self.namespace is not None:
+            content[root_node]["@xmlns"] = self.namespace
 
         xml = xmltodict.unparse(content, pretty=True)
 
@@ -129,6 +302,9 @@ class AwsResponse(starlette.responses.Response):
 
 
 class AwsErrorResponse(AwsResponse):
+    # S3 error documents are unqualified; SDKs fail to parse a namespaced <Error>
+    namespace = None
+
     def render(self, error: dict) -> bytes:
         return super().render(
             {
@@ -1,6 +1,14 @@
 from . import responses
 from . import dependencies
+from . import streams
+from . import utils
 
+from ..stack import exceptions
+from ..stack.services.s3 import models
+
+import asyncio
+import functools
+import itertools
 import fastapi
 import fastapi.responses
 
@@ -24,7 +32,6 @@ TODO:
     * Use rich for beautiful errors?
     * Ensure all errors (from constants.ERRORS) are being used appropriately
     * Remove references to aws and amz (replace with 'stack')
-    * Should I be avoiding inheriting from starlette.middleware.base.BaseHTTPMiddleware ?
     * Improve responses.RangedStreamingResponse to get the request object itself so can be used as response_class
     * Apply s3 dependency at router level so each method doesn't need to declare it.
     * Flesh out all required headers etc. for simple methods
@@ -93,16 +100,284 @@ def delete_bucket(
     return 204
 
 
+@router.get("/{bucket_name}")
+def list_objects(
+    bucket_name: str,
+    list_type: int = fastapi.Query(1, alias="list-type"),
+    prefix: str = fastapi.Query("", alias="prefix"),
+    delimiter: str = fastapi.Query(None, alias="delimiter"),
+    marker: str = fastapi.Query("", alias="marker"),
+    start_after: str = fastapi.Query("", alias="start-after"),
+    continuation_token: str = fastapi.Query(None, alias="continuation-token"),
+    max_keys: int = fastapi.Query(1000, alias="max-keys"),
+    encoding_type: str = fastapi.Query(None, alias="encoding-type"),
+    s3=fastapi.Depends(dependencies.s3),
+):
+    if list_type not in (1, 2) or max_keys < 0:
+        raise exceptions.S3Error("InvalidArgument")
+
+    if list_type == 2:
+        start = start_after
+
+        if continuation_token is not None:
+            start = max(start, utils.decode_continuation_token(continuation_token))
+    else:
+        start = marker
+
+    entries = s3.list_objects(
+        bucket_name, prefix=prefix, start_after=start, delimiter=delimiter or None
+    )
+
+    entries = list(itertools.islice(entries, min(max_keys, 1000) + 1))
+
+    # An empty page has no key to continue after, so it is never truncated
+    is_truncated = max_keys > 0 and len(entries) > min(max_keys, 1000)
+
+    del entries[min(max_keys, 1000) :]
+
+    contents = [entry for entry in entries if isinstance(entry, models.Object)]
+    common_prefixes = [
+        entry for entry in entries if isinstance(entry, models.CommonPrefix)
+    ]
+
+    if entries:
+        last = entries[-1]
+        next_marker = last.key if isinstance(last, models.Object) else last.prefix
+
+    result = {
+        "Name": bucket_name,
+        "Prefix": utils.encode_key(prefix, encoding_type),
+        "MaxKeys": max_keys,
+        "IsTruncated": utils.xml_bool(is_truncated),
+        "Contents": [
+            {
+                "Key": utils.encode_key(object.key, encoding_type),
+                "LastModified": object.last_modified_date,
+                "ETag": utils.quote_etag(object.etag),
+                "Size": object.size,
+                "StorageClass": "STANDARD",
+            }
+            for object in contents
+        ],
+        "CommonPrefixes": [
+            {"Prefix": utils.encode_key(common_prefix.prefix, encoding_type)}
+            for common_prefix in common_prefixes
+        ],
+    }
+
+    if delimiter:
+        result["Delimiter"] = utils.encode_key(delimiter, encoding_type)
+
+    if list_type == 2:
+        result["KeyCount"] = len(entries)
+
+        if continuation_token is not None:
+            result["ContinuationToken"] = continuation_token
+
+        if start_after:
+            result["StartAfter"] = utils.encode_key(start_after, encoding_type)
+
+        if is_truncated:
+            result["NextContinuationToken"] = utils.encode_continuation_token(
+                next_marker
+            )
+    else:
+        result["Marker"] = utils.encode_key(marker, encoding_type)
+
+        if is_truncated and delimiter:
+            result["NextMarker"] = utils.encode_key(next_marker, encoding_type)
+
+    if encoding_type is not None:
+        result["EncodingType"] = encoding_type
+
+    return {"ListBucketResult": result}
+
+
 @router.put("/{bucket_name}/{object_key:path}", response_class=responses.Response)
 async def put_object(
     request: fastapi.Request,
     bucket_name: str,
     object_key: str,
+    upload_id: str = fastapi.Query(None, alias="uploadId"),
+    part_number: int = fastapi.Query(None, alias="partNumber"),
+    s3=fastapi.Depends(dependencies.s3),
+    executor=fastapi.Depends(dependencies.executor),
+    upload_executor=fastapi.Depends(dependencies.upload_executor),
+):
+    copy_source = request.headers.get("x-amz-copy-source")
+
+    if copy_source is not None:
+        return await copy_object(
+            request,
+            bucket_name,
+            object_key,
+            upload_id,
+            part_number,
+            copy_source,
+            s3,
+            executor,
+        )
+
+    object_data = streams.blocking(
+        streams.chunked(request.stream(), s3.service.chunk_size),
+        asyncio.get_running_loop(),
+    )
+
+    if upload_id is not None:
+        if part_number is None:
+            raise exceptions.S3Error("InvalidArgument")
+
+        part = await upload_executor.run(
+            s3.upload_part,
+            bucket_name,
+            object_key,
+            upload_id,
+            part_number,
+            object_data,
+            content_md5=request.headers.get("content-md5"),
+        )
+
+        return responses.Response(headers={"ETag": utils.quote_etag(part.etag)})
+
+    object = await upload_executor.run(
+        s3.put_object,
+        bucket_name,
+        object_key,
+        object_data,
+        content_type=request.headers.get("content-type"),
+        metadata=utils.user_metadata(request.headers),
+        content_md5=request.headers.get("content-md5"),
+    )
+
+    return responses.Response(headers={"ETag": utils.quote_etag(object.etag)})
+
+
+async def copy_object(
+    request: fastapi.Request,
+    bucket_name: str,
+    object_key: str,
+    upload_id: str,
+    part_number: int,
+    copy_source: str,
+    s3,
+    executor,
+):
+    source_bucket_name, source_object_key = utils.parse_copy_source(copy_source)
+
+    # Checked against the source as it is opened to be copied
+    precondition = functools.partial(utils.evaluate_copy_preconditions, request.headers)
+
+    if upload_id is not None:
+        if part_number is None:
+            raise exceptions.S3Error("InvalidArgument")
+
+        byte_range = request.headers.get("x-amz-copy-source-range")
+
+        part = await executor.run(
+            s3.upload_part_copy,
+            bucket_name,
+            object_key,
+            upload_id,
+            part_number,
+            source_bucket_name,
+            source_object_key,
+            precondition=precondition,
+            byte_range=(
+                utils.parse_copy_source_range(byte_range)
+                if byte_range is not None
+                else None
+            ),
+        )
+
+        return responses.AwsResponse(
+            {
+                "CopyPartResult": {
+                    "ETag": utils.quote_etag(part.etag),
+                    "LastModified": part.last_modified_date,
+                },
+            }
+        )
+
+    metadata_directive = request.headers.get("x-amz-metadata-directive", "COPY")
+
+    if metadata_directive not in ("COPY", "REPLACE"):
+        raise exceptions.S3Error("InvalidArgument")
+
+    object = await executor.run(
+        s3.copy_object,
+        bucket_name,
+        object_key,
+        source_bucket_name,
+        source_object_key,
+        precondition=precondition,
+        metadata_directive=metadata_directive,
+        content_type=request.headers.get("content-type"),
+        metadata=utils.user_metadata(request.headers),
+    )
+
+    return responses.AwsResponse(
+        {
+            "CopyObjectResult": {
+                "ETag": utils.quote_etag(object.etag),
+                "LastModified": object.last_modified_date,
+            },
+        }
+    )
+
+
+@router.post("/{bucket_name}/{object_key:path}")
+async def post_object(
+    request: fastapi.Request,
+    bucket_name: str,
+    object_key: str,
+    upload_id: str = fastapi.Query(None, alias="uploadId"),
     s3=fastapi.Depends(dependencies.s3),
+    executor=fastapi.Depends(dependencies.executor),
 ):
-    request_body = await request.body()
+    if "uploads" in request.query_params:
+        upload = await executor.run(
+            s3.create_multipart_upload,
+            bucket_name,
+            object_key,
+            content_type=request.headers.get("content-type"),
+            metadata=utils.user_metadata(request.headers),
+        )
+
+        return {
+            "InitiateMultipartUploadResult": {
+                "Bucket": bucket_name,
+                "Key": object_key,
+                "UploadId": upload.upload_id,
+            },
+        }
+
+    if upload_id is None:
+        raise exceptions.S3Error("InvalidRequest")
+
+    payload = await dependencies.payload(request)
+
+    try:
+        parts = [
+            (int(part["PartNumber"]), part["ETag"])
+            for part in utils.xml_list(
+                (payload.get("CompleteMultipartUpload") or {}).get("Part")
+            )
+        ]
+    except (KeyError, TypeError, ValueError):
+        raise exceptions.S3Error("MalformedXML")
+
+    object = await executor.run(
+        s3.complete_multipart_upload, bucket_name, object_key, upload_id, parts
+    )
 
-    s3.put_object(bucket_name, object_key, request_body)
+    return {
+        "CompleteMultipartUploadResult": {
+            "Location": f"{request.base_url}{bucket_name}/{object_key}",
+            "Bucket": bucket_name,
+            "Key": object_key,
+            "ETag": utils.quote_etag(object.etag),
+        },
+    }
 
 
 @router.get("/{bucket_name}/{object_key:path}")
@@ -110,11 +385,42 @@ def get_object(
     request: fastapi.Request,
     bucket_name: str,
     object_key: str,
+    upload_id: str = fastapi.Query(None, alias="uploadId"),
+    part_number_marker: int = fastapi.Query(0, alias="part-number-marker"),
+    max_parts: int = fastapi.Query(1000, alias="max-parts"),
     s3=fastapi.Depends(dependencies.s3),
+    executor=fastapi.Depends(dependencies.executor),
 ):
-    object_data = s3.get_object(bucket_name, object_key)
+    if upload_id is not None:
+        return list_parts(
+            bucket_name, object_key, upload_id, part_number_marker, max_parts, s3
+        )
+
+    object, object_data = s3.open_object(
+        bucket_name,
+        object_key,
+        precondition=functools.partial(utils.evaluate_preconditions, request.headers),
+    )
 
-    return responses.RangedStreamingResponse(request, object_data)
+    # Not modified, so never opened
+    if object_data is None:
+        return responses.Response(
+            status_code=304, headers=utils.not_modified_headers(object)
+        )
+
+    headers = utils.object_headers(object)
+
+    del headers["Content-Length"]
+
+    return responses.RangedStreamingResponse(
+        request,
+        object_data,
+        size=object.size,
+        ranged=utils.range_is_current(request.headers.get("if-range"), object),
+        executor=executor,
+        chunk_size=s3.service.chunk_size,
+        headers=headers,
+    )
 
 
 @router.delete(
@@ -123,129 +429,118 @@ def get_object(
 def delete_object(
     bucket_name: str,
     object_key: str,
+    upload_id: str = fastapi.Query(None, alias="uploadId"),
     s3=fastapi.Depends(dependencies.s3),
 ):
-    s3.delete_object(bucket_name, object_key)
+    if upload_id is not None:
+        s3.abort_multipart_upload(bucket_name, object_key, upload_id)
+    else:
+        s3.delete_object(bucket_name, object_key)
 
     return 204
 
 
-@router.head("/{bucket_name}/{object_key:path}", response_class=responses.Response)
-def head_object(
+def list_parts(
     bucket_name: str,
     object_key: str,
-    s3=fastapi.Depends(dependencies.s3),
+    upload_id: str,
+    part_number_marker: int,
+    max_parts: int,
+    s3,
 ):
-    s3.head_object(bucket_name, object_key)
-
-
-"""
-@router.post('/{bucket_name}')
-async def delete_objects \
-        (
-            bucket_name: str,
-            delete: str,
-            payload = fastapi.Depends(dependencies.payload),
-            storage = fastapi.Depends(dependencies.storage),
-        ):
-    bucket = storage.get_bucket(bucket_name)
-
-    try:
-        deleted_results = []
-        error_results = []
+    if max_parts < 0 or part_number_marker < 0:
+        raise exceptions.S3Error("InvalidArgument")
 
-        object_entries = payload['Delete']['Object']
+    parts = s3.list_parts(
+        bucket_name, object_key, upload_id, part_number_marker=part_number_marker
+    )
 
-        for object_entry in object_entries:
-            object_key = object_entry['Key']
+    parts = list(itertools.islice(parts, min(max_parts, 1000) + 1))
+
+    is_truncated = len(parts) > min(max_parts, 1000)
+
+    del parts[min(max_parts, 1000) :]
+
+    result = {
+        "Bucket": bucket_name,
+        "Key": object_key,
+        "UploadId": upload_id,
+        "PartNumberMarker": part_number_marker,
+        "MaxParts": max_parts,
+        "IsTruncated": utils.xml_bool(is_truncated),
+        "StorageClass": "STANDARD",
+        "Part": [
+            {
+                "PartNumber": part.part_number,
+                "LastModified": part.last_modified_date,
+                "ETag": utils.quote_etag(part.etag),
+                "Size": part.size,
+            }
+            for part in parts
+        ],
+    }
 
-            object = bucket.get_object(object_key)
+    if is_truncated:
+        result["NextPartNumberMarker"] = parts[-1].part_number
 
-            success = object.delete() if object is not None else True
+    return responses.AwsResponse({"ListPartsResult": result})
 
-            if success:
-                result = \
-                {
-                    # 'DeleteMarker': ,
-                    # 'DeleteMarkerVersionId': ,
-                    'Key': object_key,
-                    # 'VersionId': ,
-                }
 
-                deleted_results.append(result)
-            else:
-                result = \
-                {
-                    'Code': 'AccessDenied', # Temp placeholder
-                    'Key': object_key,
-                    'Message': 'Access Denied', # Temp placeholder
-                    'VersionId': '1', # Temp placeholder
-                }
+@router.head("/{bucket_name}/{object_key:path}", response_class=responses.Response)
+def head_object(
+    request: fastapi.Request,
+    bucket_name: str,
+    object_key: str,
+    s3=fastapi.Depends(dependencies.s3),
+):
+    object = s3.head_object(bucket_name, object_key)
 
-                error_results.append(result)
+    if utils.evaluate_preconditions(request.headers, object):
+        return responses.Response(
+            status_code=304, headers=utils.not_modified_headers(object)
+        )
 
-        response_data = \
-        {
-            'Deleted': deleted_results,
-            'Error': error_results,
-        }
+    return responses.Response(headers=utils.object_headers(object))
 
-        return responses.AwsResponse('DeleteResult', response_data, pretty=True)
-    except: # This is kinda cheating
-        return responses.AwsErrorResponse() # Error!
-"""
 
-"""
-@router.get('/{bucket_name}')
-def list_objects \
-        (
-            bucket_name: str,
-            prefix: Optional[str] = None,
-            list_type: Optional[int] = 1,
-            storage = fastapi.Depends(dependencies.storage),
-        ):
-    bucket = storage.get_bucket(bucket_name)
+@router.post("/{bucket_name}")
+async def delete_objects(
+    request: fastapi.Request,
+    bucket_name: str,
+    s3=fastapi.Depends(dependencies.s3),
+    executor=fastapi.Depends(dependencies.executor),
+):
+    if "delete" not in request.query_params:
+        raise exceptions.S3Error("NotImplemented")
 
-    if bucket is None:
-        return responses.AwsErrorResponse() # Error!
+    utils.verify_integrity(request.headers, await request.body())
 
-    contents = []
+    payload = await dependencies.payload(request)
 
-    if list_type not in (1, 2):
-        return responses.AwsErrorResponse() # Error!
+    delete = (payload or {}).get("Delete") or {}
 
-    kwargs = {}
+    try:
+        object_keys = [entry["Key"] for entry in utils.xml_list(delete.get("Object"))]
+    except (KeyError, TypeError):
+        raise exceptions.S3Error("MalformedXML")
 
-    if prefix is not None:
-        kwargs['prefix'] = prefix
+    if not all(isinstance(object_key, str) for object_key in object_keys):
+        raise exceptions.S3Error("MalformedXML")
 
-    objects = bucket.list_objects(**kwargs)
+    quiet = str(delete.get("Quiet", "false")).lower() == "true"
 
-    for object in objects:
-        object_data = \
-        {
-            'Key': object.key,
-            'LastModified': utils.iso_datetime(object.last_modified_date),
-            'ETag': '', # Temp
-            'Size': object.size,
-            'StorageClass': 'STANDARD', # Temp
-        }
+    deleted, errors = await executor.run(s3.delete_objects, bucket_name, object_keys)
 
-        contents.append(object_data)
-
-    data = \
-    {
-        'IsTruncated': False,
-        # 'Marker': '',
-        # 'NextMarker': '',
-        'Contents': contents,
-        'Name': bucket.name,
-        'Prefix': prefix,
-        # 'Delimeter': '',
-        # 'MaxKeys': '',
-        # 'CommonPrefixes': '',
-        'EncodingType': 'url',
+    return {
+        "DeleteResult": {
+            "Deleted": [] if quiet else [{"Key": key} for key in deleted],
+            "Error": [
+                {
+                    "Key": key,
+                    "Code": code,
+                    "Message": exceptions.S3Error(code).description,
+                }
+                for key, code in errors
+            ],
+        },
     }
-
-    return responses.AwsResponse('ListBucketResult', data)
-"""
@@ -0,0 +1,67 @@
+from ..stack import exceptions
+
+import asyncio
+import hashlib
+from typing import AsyncIterable, AsyncIterator, Iterator
+
+
+async def chunked(
+    stream: AsyncIterable[bytes], chunk_size: int
+) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+
+    async for data in stream:
+        buffer += data
+
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+
+            del buffer[:chunk_size]
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def blocking(
+    stream: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop
+) -> Iterator[bytes]:
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+def verified(receive, expected: str, executor):
+    hasher = hashlib.sha256()
+
+    async def wrapper():
+        message = await receive()
+
+        if message["type"] == "http.request":
+            await executor.run(hasher.update, message.get("body", b""))
+
+            if not message.get("more_body", False):
+                if hasher.hexdigest() != expected:
+                    raise exceptions.S3Error("XAmzContentSHA256Mismatch")
+
+        return message
+
+    return wrapper
+
+
+def decoded(receive, decoder, executor):
+    async def wrapper():
+        message = await receive()
+
+        if message["type"] == "http.request":
+            body = await executor.run(decoder.feed, message.get("body", b""))
+
+            if not message.get("more_body", False):
+                decoder.close()
+
+            message = {**message, "body": body}
+
+        return message
+
+    return wrapper
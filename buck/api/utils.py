@@ -0,0 +1,264 @@
+from . import ranges
+from ..stack import exceptions
+
+import base64
+import binascii
+import datetime
+import email.utils
+import hashlib
+import urllib.parse
+import zlib
+
+METADATA_HEADER_PREFIX = "x-amz-meta-"
+COPY_SOURCE_HEADER_PREFIX = "x-amz-copy-source-"
+CHECKSUM_HEADER_PREFIX = "x-amz-checksum-"
+
+# Digests a request body can be checked against, by header
+INTEGRITY_HEADERS = {
+    "content-md5": lambda data: hashlib.md5(data).digest(),
+    f"{CHECKSUM_HEADER_PREFIX}crc32": lambda data: zlib.crc32(data).to_bytes(4, "big"),
+    f"{CHECKSUM_HEADER_PREFIX}sha1": lambda data: hashlib.sha1(data).digest(),
+    f"{CHECKSUM_HEADER_PREFIX}sha256": lambda data: hashlib.sha256(data).digest(),
+}
+
+
+def xml_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def xml_list(value) -> list:
+    """xmltodict yields a lone repeated element as a dict rather than a list"""
+
+    if value is None:
+        return []
+
+    if isinstance(value, list):
+        return value
+
+    return [value]
+
+
+def encode_continuation_token(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_continuation_token(token: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(token.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise exceptions.S3Error("InvalidArgument")
+
+
+def encode_key(key: str, encoding_type: str = None) -> str:
+    if encoding_type == "url":
+        return urllib.parse.quote(key, safe="/")
+
+    return key
+
+
+def quote_etag(etag: str) -> str:
+    return etag and f'"{etag}"'
+
+
+def object_headers(object) -> dict:
+    headers = {
+        "Content-Length": str(object.size),
+        "Last-Modified": email.utils.format_datetime(
+            object.last_modified_date, usegmt=True
+        ),
+    }
+
+    if object.etag is not None:
+        headers["ETag"] = quote_etag(object.etag)
+
+    if object.content_type is not None:
+        headers["Content-Type"] = object.content_type
+
+    for name, value in object.metadata.items():
+        headers[METADATA_HEADER_PREFIX + name] = value
+
+    return headers
+
+
+def user_metadata(headers) -> dict:
+    return {
+        name[len(METADATA_HEADER_PREFIX) :]: value
+        for name, value in headers.items()
+        if name.lower().startswith(METADATA_HEADER_PREFIX)
+    }
+
+
+def parse_etags(value: str) -> list:
+    etags = []
+
+    for etag in value.split(","):
+        etag = etag.strip()
+
+        if etag.startswith("W/"):
+            etag = etag[2:]
+
+        etags.append(etag.strip('"'))
+
+    return etags
+
+
+def parse_http_date(value: str):
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+
+    return int(date.timestamp())
+
+
+def etag_matches(value: str, etag: str) -> bool:
+    etags = parse_etags(value)
+
+    return "*" in etags or etag in etags
+
+
+def modified_since(value: str, object) -> bool:
+    """Whether `object` changed after the HTTP date `value` (True if unparseable)"""
+
+    date = parse_http_date(value)
+
+    return date is None or int(object.last_modified_date.timestamp()) > date
+
+
+def evaluate_preconditions(headers, object) -> bool:
+    """Checks RFC 7232 preconditions, returning True if a 304 should be sent
+
+    Raises PreconditionFailed (412) when If-Match or If-Unmodified-Since fail.
+    """
+
+    if_match = headers.get("if-match")
+    if_unmodified_since = headers.get("if-unmodified-since")
+    if_none_match = headers.get("if-none-match")
+    if_modified_since = headers.get("if-modified-since")
+
+    if if_match is not None:
+        if not etag_matches(if_match, object.etag):
+            raise exceptions.S3Error("PreconditionFailed")
+    elif if_unmodified_since is not None:
+        if parse_http_date(if_unmodified_since) is not None and modified_since(
+            if_unmodified_since, object
+        ):
+            raise exceptions.S3Error("PreconditionFailed")
+
+    if if_none_match is not None:
+        return etag_matches(if_none_match, object.etag)
+
+    if if_modified_since is not None:
+        return not modified_since(if_modified_since, object)
+
+    return False
+
+
+def verify_integrity(headers, body: bytes):
+    """Checks the Content-MD5 (or x-amz-checksum-*) a request is required to send
+
+    Checksums of algorithms not in INTEGRITY_HEADERS are accepted unchecked.
+    """
+
+    for header, digest in INTEGRITY_HEADERS.items():
+        value = headers.get(header)
+
+        if value is None:
+            continue
+
+        try:
+            expected = base64.b64decode(value, validate=True)
+        except binascii.Error:
+            raise exceptions.S3Error("InvalidDigest")
+
+        if digest(body) != expected:
+            raise exceptions.S3Error("BadDigest")
+
+        return
+
+    if not any(header.startswith(CHECKSUM_HEADER_PREFIX) for header in headers):
+        raise exceptions.S3Error("InvalidRequest")
+
+
+def evaluate_copy_preconditions(headers, object):
+    """Checks x-amz-copy-source-if-* conditions against the copy source
+
+    Unlike GET, a failed If-None-Match or If-Modified-Since is also a 412.
+    """
+
+    conditions = {
+        name: headers.get(f"{COPY_SOURCE_HEADER_PREFIX}{name}")
+        for name in (
+            "if-match",
+            "if-unmodified-since",
+            "if-none-match",
+            "if-modified-since",
+        )
+    }
+
+    if evaluate_preconditions(conditions, object):
+        raise exceptions.S3Error("PreconditionFailed")
+
+
+def parse_copy_source(value: str):
+    """Splits an x-amz-copy-source header into a (bucket, key) pair"""
+
+    source, _, query = value.partition("?")
+
+    version_id = urllib.parse.parse_qs(query).get("versionId")
+
+    if version_id is not None and version_id != ["null"]:
+        raise exceptions.S3Error("NoSuchVersion")
+
+    bucket_name, _, object_key = urllib.parse.unquote(source).lstrip("/").partition("/")
+
+    if not bucket_name or not object_key:
+        raise exceptions.S3Error("InvalidArgument")
+
+    return bucket_name, object_key
+
+
+def parse_copy_source_range(value: str):
+    """Parses x-amz-copy-source-range ("bytes=first-last") into an inclusive pair"""
+
+    unit, _, specifier = value.partition("=")
+    first, _, last = specifier.partition("-")
+
+    if (
+        unit.strip() != "bytes"
+        or not ranges.DIGITS_PATTERN.fullmatch(first)
+        or not ranges.DIGITS_PATTERN.fullmatch(last)
+    ):
+        raise exceptions.S3Error("InvalidArgument")
+
+    if int(last) < int(first):
+        raise exceptions.S3Error("InvalidArgument")
+
+    return int(first), int(last)
+
+
+def range_is_current(if_range: str, object) -> bool:
+    """Whether a Range request's If-Range validator still identifies `object`"""
+
+    if if_range is None:
+        return True
+
+    if_range = if_range.strip()
+
+    if if_range.startswith('"'):
+        return if_range.strip('"') == object.etag
+
+    # Weak validators can never satisfy If-Range
+    if if_range.startswith("W/"):
+        return False
+
+    return parse_http_date(if_range) == int(object.last_modified_date.timestamp())
+
+
+def not_modified_headers(object) -> dict:
+    headers = object_headers(object)
+
+    return {"ETag": headers["ETag"], "Last-Modified": headers["Last-Modified"]}
@@ -29,6 +29,25 @@ def cli(port: int = 8000, host: str = "127.0.0.1", path: str = "."):
         port: int = Option(port, help="Port to bind server to"),
         host: str = Option(host, help="Host to bind server to"),
         auth: str = Option(None, help="Client auth key(s)"),
+        chunk_size: int = Option(
+            1024 * 1024, min=1, help="Max bytes buffered per upload chunk"
+        ),
+        io_threads: int = Option(None, help="Storage I/O thread pool size"),
+        multipart_manifests: bool = Option(
+            False, help="Keep multipart objects as their parts, not one file"
+        ),
+        layout: str = Option(
+            None, help="Object layout for new storage: nested or sharded"
+        ),
+        durability: str = Option(
+            None, help="When writes reach disk: none, per-object or group-commit"
+        ),
+        pack_size: int = Option(
+            0, help="Pack objects up to this many bytes into segment files"
+        ),
+        map_cache: int = Option(
+            0, help="Keep this many hot object files memory-mapped for reads"
+        ),
         virtual: bool = Option(False, help="Whether to use in-memory mode"),
         dev: bool = Option(False, help="Reload server on code changes", hidden=True),
     ):
@@ -50,6 +69,13 @@ def cli(port: int = 8000, host: str = "127.0.0.1", path: str = "."):
         api_app = api(
             path=str(dir),
             auth=user_auth,
+            chunk_size=chunk_size,
+            io_threads=io_threads,
+            multipart_manifests=multipart_manifests,
+            layout=layout,
+            durability=durability,
+            pack_size=pack_size,
+            map_cache=map_cache,
         )
 
         api_app.serve(
@@ -447,4 +447,11 @@ ERRORS = {
         "description": "You have an invalid principal in policy",
         "status_code": 400,
     },
+    "XAmzContentSHA256Mismatch": {
+        "description": (
+            "The provided 'x-amz-content-sha256' header does not match what was"
+            " computed"
+        ),
+        "status_code": 400,
+    },
 }
@@ -21,3 +21,51 @@ class Model(pydantic.BaseModel):
 
     def __str__(self):
         return self.__repr__()
+
+
+class SlottedModel(object):
+    """Lightweight immutable model for the request path (no validation)"""
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for key, val in fields.items():
+            object.__setattr__(self, key, val)
+
+    def __setattr__(self, key, val):
+        raise TypeError(f"{self.__class__.__name__!r} object is immutable")
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+
+        return self.dict() == other.dict()
+
+    __hash__ = None
+
+    @classmethod
+    def fields(cls):
+        return tuple(
+            name
+            for klass in reversed(cls.__mro__)
+            for name in getattr(klass, "__slots__", ())
+        )
+
+    def dict(self):
+        return {name: getattr(self, name) for name in self.fields()}
+
+    def __repr__(self, **fields):
+        if not fields:
+            fields = self.dict()
+
+        class_name = self.__class__.__name__
+
+        if not fields:
+            return f"<{class_name} />"
+
+        attributes = " ".join(f"{key}={val!r}" for key, val in fields.items())
+
+        return f"<{class_name}: {attributes}>"
+
+    def __str__(self):
+        return self.__repr__()
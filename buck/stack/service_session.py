@@ -1,15 +1,11 @@
 from . import model
-from . import stack
-from . import service
-from . import user
 
-from typing import Optional
 
+class StackServiceSession(model.SlottedModel):
+    __slots__ = ("service", "stack", "user")
 
-class StackServiceSession(model.Model):
-    service: service.StackService
-    stack: stack.Stack
-    user: Optional[user.StackUser]
+    def __init__(self, *, service, stack, user, **fields):
+        super().__init__(service=service, stack=stack, user=user, **fields)
 
     def __repr__(self):
         return super().__repr__(
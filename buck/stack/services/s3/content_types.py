@@ -0,0 +1,29 @@
+import magic
+import mimetypes
+import posixpath
+from typing import Optional
+
+# What S3 reports for objects uploaded without a Content-Type
+DEFAULT_CONTENT_TYPE = "binary/octet-stream"
+
+SNIFF_SIZE = 2048
+
+
+def from_extension(key: str) -> Optional[str]:
+    _, extension = posixpath.splitext(key)
+
+    if extension:
+        content_type, _ = mimetypes.guess_type(f"object{extension}", strict=False)
+
+        return content_type
+
+
+def from_data(data: bytes) -> str:
+    if not data:
+        return DEFAULT_CONTENT_TYPE
+
+    return magic.from_buffer(bytes(data[:SNIFF_SIZE]), mime=True)
+
+
+def guess(key: str, data: bytes) -> str:
+    return from_extension(key) or from_data(data)
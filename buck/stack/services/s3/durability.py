@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+from typing import Iterable, Optional, Set, Union
+
+# A target is an open file descriptor, or the path of a file or directory
+Target = Union[int, str]
+
+GROUP_COMMIT_WINDOW = 0.001
+
+
+def fsync(target: Target):
+    if isinstance(target, int):
+        return os.fsync(target)
+
+    try:
+        fd = os.open(target, os.O_RDONLY)
+    except FileNotFoundError:
+        # Gone since, e.g. a WAL file emptied by a checkpoint, which syncs
+        return
+
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class NoDurability(object):
+    """Leaves writes to the OS, which flushes them in its own time
+
+    An acknowledged write can be lost on power failure, though never torn.
+    """
+
+    name = "none"
+    durable = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+    def sync(self, targets: Iterable[Target]):
+        pass
+
+
+class PerObjectDurability(NoDurability):
+    """Flushes each write's files and directories before acknowledging it"""
+
+    name = "per-object"
+    durable = True
+
+    def sync(self, targets: Iterable[Target]):
+        for target in dict.fromkeys(targets):
+            fsync(target)
+
+
+class _Batch(object):
+    __slots__ = ("targets", "writers", "done", "error")
+
+    def __init__(self):
+        self.targets: Set[Target] = set()
+        self.writers = 0
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommitDurability(NoDurability):
+    """Flushes concurrent writes together, acknowledging each once its batch is
+
+    The first writer into a batch leads it: it waits for the batch before to
+    finish, then syncs every target in the batch once. Shared directories and
+    the metadata journal are synced once per batch rather than once per write.
+    When the batch before was shared, the leader also waits `window` seconds
+    for more writers to join; a lone writer never waits.
+    """
+
+    name = "group-commit"
+    durable = True
+
+    def __init__(self, window: float = GROUP_COMMIT_WINDOW):
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._batch = _Batch()
+        self._shared = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: window={self.window!r}>"
+
+    def sync(self, targets: Iterable[Target]):
+        with self._lock:
+            batch = self._batch
+            batch.targets.update(targets)
+            batch.writers += 1
+
+            leader = batch.writers == 1
+
+        if leader:
+            with self._flushing:
+                if self._shared and self.window:
+                    time.sleep(self.window)
+
+                with self._lock:
+                    self._batch = _Batch()
+                    self._shared = batch.writers > 1
+
+                try:
+                    for target in batch.targets:
+                        fsync(target)
+                except BaseException as error:
+                    batch.error = error
+                finally:
+                    batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (NoDurability, PerObjectDurability, GroupCommitDurability)
+}
@@ -0,0 +1,32 @@
+from ... import exceptions
+
+import base64
+import binascii
+import hashlib
+from typing import Iterable
+
+
+def hasher():
+    return hashlib.md5()
+
+
+def decode_content_md5(value: str) -> bytes:
+    """Decodes a Content-MD5 header into the raw 16 byte digest"""
+
+    try:
+        digest = base64.b64decode(value.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise exceptions.S3Error("InvalidDigest")
+
+    if len(digest) != hasher().digest_size:
+        raise exceptions.S3Error("InvalidDigest")
+
+    return digest
+
+
+def multipart_etag(part_digests: Iterable[bytes]) -> str:
+    """The md5-of-md5s-N ETag S3 reports for an object assembled from N parts"""
+
+    part_digests = list(part_digests)
+
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
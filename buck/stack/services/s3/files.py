@@ -0,0 +1,201 @@
+import errno
+import io
+import os
+import sys
+from typing import IO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# Errors meaning "the kernel can't copy between these two files", not "failed"
+UNSUPPORTED = frozenset(
+    (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF)
+)
+
+# Filesystems without reflinks also answer FICLONE with ENOTTY
+CLONE_UNSUPPORTED = UNSUPPORTED | {errno.ENOTTY}
+
+# Upper bound on a single copy_file_range/sendfile call
+COPY_BLOCK_SIZE = 1024**3
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+class RangeReader(io.RawIOBase):
+    """Read-only, seekable file of `size` bytes, read by position
+
+    Subclasses implement `pread`, filling a buffer from an offset; those
+    backed by whole files also implement `slices`, yielding the (file,
+    offset, count) runs behind a range, for zero-copy sends and pread.
+    """
+
+    def __init__(self, size: int):
+        super().__init__()
+
+        self.size = size
+
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        elif whence != os.SEEK_SET:
+            raise ValueError(f"invalid whence ({whence!r})")
+
+        if offset < 0:
+            raise ValueError(f"negative seek position {offset!r}")
+
+        self._position = offset
+
+        return offset
+
+    def pread(self, view: memoryview, offset: int) -> int:
+        """Fills `view` from `offset`, which it never reads past the end from"""
+
+        raise NotImplementedError
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        count = min(len(view), self.size - self._position)
+
+        if count <= 0:
+            return 0
+
+        filled = self.pread(view[:count], self._position)
+
+        self._position += filled
+
+        return filled
+
+
+def fileno(file: IO[bytes]) -> Optional[int]:
+    try:
+        return file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _copy_fds(source: int, destination: int, offset: int, count: int) -> int:
+    copy = getattr(os, "copy_file_range", None)
+    copied = 0
+
+    while copied < count:
+        size = min(count - copied, COPY_BLOCK_SIZE)
+
+        if copy is not None:
+            try:
+                length = copy(source, destination, size, offset + copied)
+            except OSError as error:
+                if copied or error.errno not in UNSUPPORTED:
+                    raise
+
+                copy = None
+
+                continue
+        else:
+            length = os.sendfile(destination, source, offset + copied, size)
+
+        if not length:
+            break
+
+        copied += length
+
+    return copied
+
+
+def copy(
+    source: IO[bytes],
+    destination: IO[bytes],
+    chunk_size: int,
+    offset: int = None,
+    count: int = None,
+) -> int:
+    """Appends `count` bytes of `source` from `offset` to `destination`
+
+    By default that is the rest of `source`. Between two OS files the kernel
+    moves the data (copy_file_range, falling back to sendfile); otherwise it
+    is streamed through in `chunk_size` blocks. Returns the bytes copied.
+    """
+
+    if offset is None:
+        offset = source.tell()
+
+    if count is None:
+        count = sys.maxsize
+
+    source_fd = fileno(source)
+    destination_fd = fileno(destination)
+
+    if source_fd is not None and destination_fd is not None:
+        destination.flush()
+
+        try:
+            return _copy_fds(source_fd, destination_fd, offset, count)
+        except OSError as error:
+            if error.errno not in UNSUPPORTED:
+                raise
+
+    copied = 0
+
+    for chunk in read(source, offset, count, chunk_size):
+        destination.write(chunk)
+
+        copied += len(chunk)
+
+    return copied
+
+
+def clone(source: IO[bytes], destination: IO[bytes]) -> bool:
+    """Makes `destination` a copy-on-write clone of `source`, if possible
+
+    Only filesystems with reflinks (Btrfs, XFS, ...) can; returns False when
+    the data has to be copied instead.
+    """
+
+    source_fd = fileno(source)
+    destination_fd = fileno(destination)
+
+    if fcntl is None or source_fd is None or destination_fd is None:
+        return False
+
+    destination.flush()
+
+    try:
+        fcntl.ioctl(destination_fd, FICLONE, source_fd)
+    except OSError as error:
+        if error.errno not in CLONE_UNSUPPORTED:
+            raise
+
+        return False
+
+    return True
+
+
+def read(file: IO[bytes], offset: int, count: int, chunk_size: int) -> Iterator[bytes]:
+    """Yields `count` bytes of `file` from `offset`, in `chunk_size` blocks"""
+
+    file.seek(offset)
+
+    while count > 0:
+        chunk = file.read(min(chunk_size, count))
+
+        if not chunk:
+            return
+
+        count -= len(chunk)
+
+        yield chunk
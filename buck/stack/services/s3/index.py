@@ -0,0 +1,281 @@
+import bisect
+import threading
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+
+def prefix_end(prefix: str) -> Optional[str]:
+    """Smallest string greater than every string beginning with `prefix`"""
+
+    for index in range(len(prefix) - 1, -1, -1):
+        if ord(prefix[index]) < 0x10FFFF:
+            return prefix[:index] + chr(ord(prefix[index]) + 1)
+
+
+class KeyIndex(object):
+    """Sorted set of object keys, stored as a list of bounded sorted blocks
+
+    Lookups, inserts and removals are a bisect over the block maxima plus a
+    bisect (and bounded list shift) within one block.
+    """
+
+    block_size = 1024
+
+    def __init__(self, keys: Iterable[str] = ()):
+        self._lock = threading.RLock()
+        self._blocks = []
+        self._maxes = []
+        self._length = 0
+
+        keys = sorted(set(keys))
+        half = self.block_size // 2
+
+        for index in range(0, len(keys), half):
+            block = keys[index : index + half]
+
+            self._blocks.append(block)
+            self._maxes.append(block[-1])
+
+        self._length = len(keys)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: keys={len(self)}>"
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, key: str):
+        with self._lock:
+            index = bisect.bisect_left(self._maxes, key)
+
+            if index == len(self._maxes):
+                return False
+
+            block = self._blocks[index]
+            position = bisect.bisect_left(block, key)
+
+            return position < len(block) and block[position] == key
+
+    def add(self, key: str):
+        with self._lock:
+            if not self._blocks:
+                self._blocks.append([key])
+                self._maxes.append(key)
+                self._length += 1
+
+                return
+
+            index = bisect.bisect_left(self._maxes, key)
+
+            if index == len(self._maxes):
+                index -= 1
+
+            block = self._blocks[index]
+            position = bisect.bisect_left(block, key)
+
+            if position < len(block) and block[position] == key:
+                return
+
+            block.insert(position, key)
+
+            self._maxes[index] = block[-1]
+            self._length += 1
+
+            if len(block) > self.block_size:
+                half = len(block) // 2
+
+                self._blocks.insert(index + 1, block[half:])
+                self._maxes.insert(index + 1, block[-1])
+
+                del block[half:]
+
+                self._maxes[index] = block[-1]
+
+    def discard(self, key: str):
+        with self._lock:
+            index = bisect.bisect_left(self._maxes, key)
+
+            if index == len(self._maxes):
+                return
+
+            block = self._blocks[index]
+            position = bisect.bisect_left(block, key)
+
+            if position == len(block) or block[position] != key:
+                return
+
+            del block[position]
+
+            self._length -= 1
+
+            if block:
+                self._maxes[index] = block[-1]
+            else:
+                del self._blocks[index]
+                del self._maxes[index]
+
+    def _slice(self, key: str, exclusive: bool):
+        search = bisect.bisect_right if exclusive else bisect.bisect_left
+
+        with self._lock:
+            index = search(self._maxes, key)
+
+            if index == len(self._maxes):
+                return []
+
+            block = self._blocks[index]
+
+            return block[search(block, key) :]
+
+    def iter_from(self, key: str = "", *, exclusive: bool = False) -> Iterator[str]:
+        """Iterate keys in order starting at (or, if exclusive, after) `key`
+
+        Only one block is copied at a time, under the lock, so concurrent
+        writers are never blocked for the length of a listing.
+        """
+
+        while True:
+            block = self._slice(key, exclusive)
+
+            if not block:
+                return
+
+            yield from block
+
+            key = block[-1]
+            exclusive = True
+
+    def scan(
+        self, prefix: str = "", start_after: str = "", delimiter: str = None
+    ) -> Iterator[Tuple[str, bool]]:
+        """Yields `(key, False)` for keys and `(common_prefix, True)` for rolled
+        up common prefixes, in order, beginning after `start_after`
+
+        When a key rolls up into a common prefix the scan seeks straight past
+        every other key sharing it, so the cost is proportional to the number
+        of entries returned rather than the number of keys beneath `prefix`.
+        """
+
+        if start_after >= prefix:
+            start, exclusive = start_after, True
+        else:
+            start, exclusive = prefix, False
+
+        if delimiter and start.startswith(prefix):
+            position = start.find(delimiter, len(prefix))
+
+            # The common prefix enclosing `start` sorts before it, so has
+            # already been returned
+            if position != -1:
+                start, exclusive = prefix_end(start[: position + len(delimiter)]), False
+
+        while start is not None:
+            keys = self.iter_from(start, exclusive=exclusive)
+
+            start = None
+
+            for key in keys:
+                if not key.startswith(prefix):
+                    return
+
+                if delimiter:
+                    position = key.find(delimiter, len(prefix))
+
+                    if position != -1:
+                        common_prefix = key[: position + len(delimiter)]
+
+                        yield common_prefix, True
+
+                        start, exclusive = prefix_end(common_prefix), False
+
+                        break
+
+                yield key, False
+
+
+class Loading(object):
+    """A key index being loaded, and the changes to its keys made meanwhile"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.changes = []
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: changes={len(self.changes)}>"
+
+
+class Index(object):
+    """Lazily loaded key index for each bucket
+
+    Loading a bucket walks all of it, so is done outside the lock: other
+    buckets are used as normal meanwhile, and changes to the bucket's own
+    keys are recorded and replayed onto its index before it is published.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: buckets={len(self._buckets)}>"
+
+    def get(self, bucket_name: str, load: Callable[[], Iterable[str]]) -> KeyIndex:
+        while True:
+            with self._lock:
+                entry = self._buckets.get(bucket_name)
+
+                if entry is None:
+                    loading = self._buckets[bucket_name] = Loading()
+
+                    break
+
+            if isinstance(entry, KeyIndex):
+                return entry
+
+            entry.done.wait()
+
+        try:
+            key_index = KeyIndex(load())
+        except BaseException:
+            with self._lock:
+                if self._buckets.get(bucket_name) is loading:
+                    del self._buckets[bucket_name]
+
+            loading.done.set()
+
+            raise
+
+        with self._lock:
+            for change, key in loading.changes:
+                change(key_index, key)
+
+            # Unless the bucket was dropped while loading
+            if self._buckets.get(bucket_name) is loading:
+                self._buckets[bucket_name] = key_index
+
+        loading.done.set()
+
+        return key_index
+
+    def add(self, bucket_name: str, key: str):
+        self._change(bucket_name, KeyIndex.add, key)
+
+    def discard(self, bucket_name: str, key: str):
+        self._change(bucket_name, KeyIndex.discard, key)
+
+    def drop(self, bucket_name: str):
+        with self._lock:
+            self._buckets.pop(bucket_name, None)
+
+    def _change(
+        self, bucket_name: str, change: Callable[[KeyIndex, str], None], key: str
+    ):
+        with self._lock:
+            entry = self._buckets.get(bucket_name)
+
+            if isinstance(entry, Loading):
+                entry.changes.append((change, key))
+
+                return
+
+        if entry is not None:
+            change(entry, key)
@@ -0,0 +1,142 @@
+from .metadata import MetadataStore
+from ... import exceptions
+
+from fs.base import FS
+import fs.errors
+import fs.path
+import hashlib
+import pathlib
+from typing import Iterable, Iterator
+
+
+class NestedLayout(object):
+    """Stores each object at ``<bucket>/<key>``, reading its key as a path
+
+    The bucket directories mirror the keys, so the store can be browsed (and
+    backfilled) as plain files. The price is a directory per key segment,
+    created on PUT and pruned on DELETE, and keys that can't coexist as paths
+    (``a/b`` and ``a/b/c``).
+    """
+
+    name = "nested"
+
+    def __init__(self, filesystem: FS, metadata: MetadataStore):
+        self.fs = filesystem
+        self.metadata = metadata
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+    @staticmethod
+    def _path(bucket_name: str, object_key: str) -> pathlib.Path:
+        # Keys must not climb out of their bucket, into another bucket or
+        # the store's own files under .buck
+        segments = object_key.split("/")
+
+        if object_key.startswith("/") or "." in segments or ".." in segments:
+            raise exceptions.S3Error("InvalidRequest")
+
+        return pathlib.Path(bucket_name).joinpath(object_key)
+
+    def path(self, bucket_name: str, object_key: str) -> str:
+        return str(self._path(bucket_name, object_key))
+
+    def prepare(self, bucket_name: str, object_key: str) -> str:
+        """Creates the parent directories for a new object, returning its path"""
+
+        path = self._path(bucket_name, object_key)
+
+        if self.fs.isdir(str(path)):
+            raise exceptions.S3Error("InvalidRequest")
+
+        for parent in map(str, list(path.parents)[-3::-1]):
+            if self.fs.isfile(parent):
+                raise exceptions.S3Error("InvalidRequest")
+
+        # Concurrent writes may be creating, or pruning, the same parents;
+        # any pruned are made again as the object is installed
+        try:
+            self.fs.makedirs(str(path.parent), recreate=True)
+        except fs.errors.ResourceNotFound:
+            pass
+
+        return str(path)
+
+    def prune(self, bucket_name: str, object_keys: Iterable[str]):
+        """Removes directories left empty by deleting `object_keys`, deepest first"""
+
+        parents = set()
+
+        for object_key in object_keys:
+            path = self._path(bucket_name, object_key)
+
+            parents.update(map(str, list(path.parents)[:-2]))
+
+        for parent in sorted(
+            parents, key=lambda parent: parent.count("/"), reverse=True
+        ):
+            try:
+                if self.fs.isempty(parent):
+                    self.fs.removedir(parent)
+            except (fs.errors.ResourceNotFound, fs.errors.DirectoryNotEmpty):
+                pass
+
+    def keys(self, bucket_name: str) -> Iterator[str]:
+        for path in self.fs.walk.files(bucket_name):
+            yield fs.path.relpath(path)[len(bucket_name) + 1 :]
+
+        # Objects packed in segments have no file of their own
+        yield from self.metadata.keys(bucket_name, packed=True)
+
+    def is_empty(self, bucket_name: str) -> bool:
+        return self.fs.isempty(bucket_name) and self.metadata.is_empty(
+            bucket_name, packed=True
+        )
+
+
+class ShardedLayout(NestedLayout):
+    """Stores objects in fixed-fanout directories named by a hash of their key
+
+    Data for ``<bucket>/<key>`` lives at ``ab/cd/<digest>`` under `directory`,
+    where the digest is the SHA-256 of the bucket and key. Every PUT or DELETE
+    touches one directory whatever the key's depth, no directory grows past
+    a 65536th of the objects, and any two keys can coexist. Keys are listed
+    from the metadata store, which is the only record of them.
+    """
+
+    name = "sharded"
+
+    def __init__(self, filesystem: FS, metadata: MetadataStore, directory: str):
+        super().__init__(filesystem, metadata)
+
+        self.directory = directory
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: directory={self.directory!r}>"
+
+    def path(self, bucket_name: str, object_key: str) -> str:
+        digest = hashlib.sha256(f"{bucket_name}/{object_key}".encode()).hexdigest()
+
+        return f"{self.directory}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def prepare(self, bucket_name: str, object_key: str) -> str:
+        path = self.path(bucket_name, object_key)
+        shard = fs.path.dirname(path)
+
+        if not self.fs.isdir(shard):
+            self.fs.makedirs(shard, recreate=True)
+
+        return path
+
+    def prune(self, bucket_name: str, object_keys: Iterable[str]):
+        # Shard directories are shared, and kept
+        pass
+
+    def keys(self, bucket_name: str) -> Iterator[str]:
+        return iter(self.metadata.keys(bucket_name))
+
+    def is_empty(self, bucket_name: str) -> bool:
+        return self.metadata.is_empty(bucket_name)
+
+
+LAYOUTS = {layout.name: layout for layout in (NestedLayout, ShardedLayout)}
@@ -0,0 +1,202 @@
+from . import files
+
+import bisect
+import collections
+import itertools
+import threading
+from typing import IO, Callable, Dict, Iterator, Optional, Sequence, Set, Tuple
+
+MANIFEST_CACHE_SIZE = 1024
+
+
+class Manifest(object):
+    """Offset index over the ordered part files making up one object
+
+    ``offsets[i]`` is where part ``i`` begins within the object, so finding
+    the part holding any byte is a bisect, whatever the number of parts.
+    """
+
+    __slots__ = ("paths", "offsets")
+
+    def __init__(self, paths: Sequence[str], sizes: Sequence[int]):
+        self.paths = list(paths)
+        self.offsets = list(itertools.accumulate(sizes, initial=0))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: parts={len(self.paths)} size={self.size}>"
+
+    @property
+    def size(self) -> int:
+        return self.offsets[-1]
+
+    def locate(self, offset: int) -> int:
+        """Index of the part holding byte `offset`"""
+
+        return bisect.bisect_right(self.offsets, offset) - 1
+
+    def slices(self, offset: int, count: int) -> Iterator[Tuple[int, int, int]]:
+        """Yields (part index, offset within part, count) runs covering a range"""
+
+        end = min(offset + count, self.size)
+        index = self.locate(offset)
+
+        while offset < end:
+            length = min(end, self.offsets[index + 1]) - offset
+
+            if length:
+                yield index, offset - self.offsets[index], length
+
+            offset += length
+            index += 1
+
+
+class ManifestReader(files.RangeReader):
+    """Read-only, seekable file over a manifest's parts
+
+    Part files are opened on first use and stay open until the reader is
+    closed, when `on_close` is called.
+    """
+
+    def __init__(
+        self,
+        manifest: Manifest,
+        opener: Callable[[str], IO[bytes]],
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        super().__init__(manifest.size)
+
+        self.manifest = manifest
+
+        self._opener = opener
+        self._on_close = on_close
+        self._files: Dict[int, IO[bytes]] = {}
+
+    def part(self, index: int) -> IO[bytes]:
+        file = self._files.get(index)
+
+        if file is None:
+            file = self._files[index] = self._opener(self.manifest.paths[index])
+
+        return file
+
+    def slices(self, offset: int, count: int) -> Iterator[Tuple[IO[bytes], int, int]]:
+        """Yields (part file, offset, count) runs backing `count` bytes at `offset`"""
+
+        for index, part_offset, length in self.manifest.slices(offset, count):
+            yield self.part(index), part_offset, length
+
+    def pread(self, view: memoryview, offset: int) -> int:
+        filled = 0
+
+        for file, part_offset, count in self.slices(offset, len(view)):
+            file.seek(part_offset)
+
+            chunk = file.read(count)
+
+            view[filled : filled + len(chunk)] = chunk
+            filled += len(chunk)
+
+            if len(chunk) < count:
+                break
+
+        return filled
+
+    def close(self):
+        if self.closed:
+            return
+
+        try:
+            for file in self._files.values():
+                file.close()
+
+            self._files.clear()
+        finally:
+            super().close()
+
+            if self._on_close is not None:
+                self._on_close()
+
+
+class ManifestReaders(object):
+    """Open readers per manifest, so parts outlive the object while being read
+
+    Readers open part files lazily, so a manifest's parts can only be removed
+    once the object is gone (`retire`) and its last reader closed (`release`);
+    whichever happens last says so.
+
+    A manifest never changes once its object is complete, so the most
+    recently read are kept built, until the object is gone.
+    """
+
+    def __init__(self, capacity: int = MANIFEST_CACHE_SIZE):
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._readers: Dict[str, int] = {}
+        self._retired: Set[str] = set()
+        self._manifests = collections.OrderedDict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: manifests={len(self._readers)}>"
+
+    def acquire(self, manifest: str, build: Callable[[], Manifest]) -> Manifest:
+        """Opens a reader, returning the manifest, built with `build()` if need be"""
+
+        with self._lock:
+            self._readers[manifest] = self._readers.get(manifest, 0) + 1
+
+            built = self._manifests.get(manifest)
+
+            if built is not None:
+                self._manifests.move_to_end(manifest)
+
+                return built
+
+        try:
+            built = build()
+        except BaseException:
+            self.release(manifest)
+
+            raise
+
+        with self._lock:
+            if manifest not in self._retired:
+                self._manifests[manifest] = built
+
+                while len(self._manifests) > self.capacity:
+                    self._manifests.popitem(last=False)
+
+        return built
+
+    def release(self, manifest: str) -> bool:
+        """Closes a reader, returning whether the manifest's parts can go now"""
+
+        with self._lock:
+            readers = self._readers[manifest] - 1
+
+            if readers:
+                self._readers[manifest] = readers
+
+                return False
+
+            del self._readers[manifest]
+
+            if manifest in self._retired:
+                self._retired.discard(manifest)
+
+                return True
+
+            return False
+
+    def retire(self, manifest: str) -> bool:
+        """Marks a manifest's object gone, returning whether its parts can go now"""
+
+        with self._lock:
+            self._manifests.pop(manifest, None)
+
+            if self._readers.get(manifest):
+                self._retired.add(manifest)
+
+                return False
+
+            return True
@@ -0,0 +1,151 @@
+from . import files
+
+import collections
+import mmap
+import threading
+
+from typing import IO, Callable, Optional
+
+MAP_CACHE_SIZE = 256
+
+
+class Mapping(object):
+    """An object file and a read-only memory map of it, shared by its readers
+
+    The file is kept open so readers can still hand its descriptor to the
+    kernel (zero-copy sends, copy_file_range). Both are closed once the
+    mapping is out of the cache and its last reader is closed.
+    """
+
+    __slots__ = ("path", "file", "map", "readers")
+
+    def __init__(self, path: str, file: IO[bytes], map: mmap.mmap):
+        self.path = path
+        self.file = file
+        self.map = map
+        self.readers = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: path={self.path!r}>"
+
+    def close(self):
+        self.file.close()
+
+        try:
+            self.map.close()
+        except BufferError:
+            # Views are still being sent; the map goes once they are dropped
+            pass
+
+
+class MappedFile(files.RangeReader):
+    """Read-only, seekable file over a mapping
+
+    Reads copy straight out of the map, and `view` slices it without copying
+    at all. Closing the file releases the mapping, not the map itself.
+    """
+
+    def __init__(self, cache: "MapCache", mapping: Mapping):
+        super().__init__(len(mapping.map))
+
+        self.cache = cache
+        self.mapping = mapping
+
+    def fileno(self) -> int:
+        return self.mapping.file.fileno()
+
+    def view(self, offset: int, count: int) -> memoryview:
+        """The `count` bytes from `offset`, in place in the map"""
+
+        return memoryview(self.mapping.map)[offset : offset + count]
+
+    def pread(self, view: memoryview, offset: int) -> int:
+        view[:] = self.view(offset, len(view))
+
+        return len(view)
+
+    def close(self):
+        if not self.closed:
+            self.cache.release(self.mapping)
+
+        super().close()
+
+
+class MapCache(object):
+    """LRU of memory-mapped object files, by path
+
+    Hot objects are read without opening, mapping or copying them again.
+    Writers `discard` a path when they replace or delete its file, under the
+    same lock readers `open` it under; readers that already have the old
+    mapping finish reading the old data.
+
+    Files must never change in place once written, or reading a truncated
+    map faults. Objects are always renamed into place, so only files edited
+    behind the store's back are a danger.
+    """
+
+    def __init__(self, capacity: int = MAP_CACHE_SIZE):
+        self.capacity = capacity
+
+        self._lock = threading.Lock()
+        self._mappings = collections.OrderedDict()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: capacity={self.capacity!r}>"
+
+    def __len__(self):
+        return len(self._mappings)
+
+    def open(self, path: str, opener: Callable[[], IO[bytes]]) -> IO[bytes]:
+        """Returns a reader over the mapping of `path`, mapping it if need be
+
+        Empty files can't be mapped, and are returned as opened.
+        """
+
+        with self._lock:
+            mapping = self._mappings.get(path)
+
+            if mapping is not None:
+                self._mappings.move_to_end(path)
+                mapping.readers += 1
+
+                return MappedFile(self, mapping)
+
+        file = opener()
+
+        try:
+            map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return file
+        except BaseException:
+            file.close()
+
+            raise
+
+        mapping = Mapping(path, file, map)
+        mapping.readers = 1
+
+        with self._lock:
+            self._evict(self._mappings.pop(path, None))
+
+            self._mappings[path] = mapping
+
+            while len(self._mappings) > self.capacity:
+                self._evict(self._mappings.popitem(last=False)[1])
+
+        return MappedFile(self, mapping)
+
+    def discard(self, path: str):
+        with self._lock:
+            self._evict(self._mappings.pop(path, None))
+
+    def release(self, mapping: Mapping):
+        with self._lock:
+            mapping.readers -= 1
+
+            if not mapping.readers and self._mappings.get(mapping.path) is not mapping:
+                mapping.close()
+
+    def _evict(self, mapping: Optional[Mapping]):
+        if mapping is not None and not mapping.readers:
+            mapping.close()
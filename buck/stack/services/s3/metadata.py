@@ -0,0 +1,486 @@
+import contextlib
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_modified REAL NOT NULL,
+    etag TEXT,
+    content_type TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    manifest TEXT,
+    segment INTEGER,
+    position INTEGER,
+    PRIMARY KEY (bucket, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    initiated REAL NOT NULL,
+    content_type TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS parts (
+    upload_id TEXT NOT NULL,
+    part_number INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    last_modified REAL NOT NULL,
+    PRIMARY KEY (upload_id, part_number)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Columns added after a table first shipped, as (table, column, definition)
+MIGRATIONS = (
+    ("objects", "manifest", "TEXT"),
+    ("objects", "segment", "INTEGER"),
+    ("objects", "position", "INTEGER"),
+)
+
+# Indexes on migrated columns, created once the columns exist
+INDEXES = """
+CREATE INDEX IF NOT EXISTS objects_segment ON objects (segment)
+WHERE segment IS NOT NULL;
+"""
+
+COLUMNS = (
+    "key, size, last_modified, etag, content_type, metadata, manifest, "
+    "segment, position"
+)
+
+SELECT = f"SELECT {COLUMNS} FROM objects WHERE bucket = ? AND key = ?"
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older builds
+MAX_VARIABLES = 500
+
+
+class Metadata(NamedTuple):
+    size: int
+    last_modified: float
+    etag: Optional[str] = None
+    content_type: Optional[str] = None
+    metadata: Dict[str, str] = {}
+    # Multipart objects stored as their part files name the upload here
+    manifest: Optional[str] = None
+    # Small objects packed into a segment file are found at this position
+    segment: Optional[int] = None
+    position: Optional[int] = None
+
+
+class Upload(NamedTuple):
+    bucket: str
+    key: str
+    initiated: float
+    content_type: Optional[str] = None
+    metadata: Dict[str, str] = {}
+
+
+class Part(NamedTuple):
+    part_number: int
+    size: int
+    etag: str
+    last_modified: float
+
+
+def _record(row) -> Metadata:
+    key, size, last_modified, etag, content_type, metadata, *location = row
+
+    return Metadata(
+        size,
+        last_modified,
+        etag,
+        content_type,
+        json.loads(metadata) if metadata != "{}" else {},
+        *location,
+    )
+
+
+class MetadataStore(object):
+    """Object metadata persisted in SQLite, keyed by (bucket, key)
+
+    On disk the database runs in WAL mode with one connection per thread, so
+    readers never wait on a writer. Without a path the store lives in memory
+    behind a single shared connection.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._shared = None if path else self._connect(":memory:")
+
+        self._migrate(self._connection())
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: path={self.path!r}>"
+
+    @property
+    def journal(self) -> Optional[str]:
+        """The write-ahead log, where commits land until a checkpoint"""
+
+        if self.path is not None:
+            return f"{self.path}-wal"
+
+    def _connect(self, database: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            database, timeout=30, isolation_level=None, check_same_thread=False
+        )
+
+        if database != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+        return connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection):
+        connection.executescript(SCHEMA)
+
+        for table, column, definition in MIGRATIONS:
+            columns = {
+                row[1] for row in connection.execute(f"PRAGMA table_info({table})")
+            }
+
+            if column not in columns:
+                connection.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                )
+
+        connection.executescript(INDEXES)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+
+        try:
+            return self._local.connection
+        except AttributeError:
+            connection = self._local.connection = self._connect(self.path)
+
+            return connection
+
+    @contextlib.contextmanager
+    def transaction(self):
+        connection = self._connection()
+
+        # Writers queue here rather than spinning on SQLITE_BUSY
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+
+                raise
+
+            connection.execute("COMMIT")
+
+    def get(self, bucket_name: str, key: str) -> Optional[Metadata]:
+        row = self._connection().execute(SELECT, (bucket_name, key)).fetchone()
+
+        if row is not None:
+            return _record(row)
+
+    def get_many(self, bucket_name: str, keys: Iterable[str]) -> Dict[str, Metadata]:
+        connection = self._connection()
+        keys = list(keys)
+        records = {}
+
+        for index in range(0, len(keys), MAX_VARIABLES):
+            batch = keys[index : index + MAX_VARIABLES]
+
+            rows = connection.execute(
+                f"SELECT {COLUMNS} FROM objects WHERE bucket = ? "
+                f"AND key IN ({', '.join('?' * len(batch))})",
+                (bucket_name, *batch),
+            ).fetchall()
+
+            for row in rows:
+                records[row[0]] = _record(row)
+
+        return records
+
+    def keys(self, bucket_name: str, packed: bool = False) -> List[str]:
+        """The keys recorded in `bucket_name`, or only those packed in segments"""
+
+        query = "SELECT key FROM objects WHERE bucket = ?"
+
+        if packed:
+            query += " AND segment IS NOT NULL"
+
+        return [key for (key,) in self._connection().execute(query, (bucket_name,))]
+
+    def is_empty(self, bucket_name: str = None, packed: bool = False) -> bool:
+        """Whether no objects are recorded at all, or in `bucket_name`
+
+        With `packed`, only objects packed in segments count.
+        """
+
+        query, parameters = "SELECT 1 FROM objects WHERE 1", ()
+
+        if bucket_name is not None:
+            query, parameters = query + " AND bucket = ?", (bucket_name,)
+
+        if packed:
+            query += " AND segment IS NOT NULL"
+
+        return (
+            self._connection().execute(query + " LIMIT 1", parameters).fetchone()
+            is None
+        )
+
+    def setting(self, name: str, default: str) -> str:
+        """Returns a store-wide setting, recording `default` if it has none yet"""
+
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO settings VALUES (?, ?)", (name, default)
+            )
+
+            return connection.execute(
+                "SELECT value FROM settings WHERE name = ?", (name,)
+            ).fetchone()[0]
+
+    def put(self, bucket_name: str, key: str, record: Metadata) -> Optional[str]:
+        """Records an object, returning the manifest of the one it replaced"""
+
+        with self.transaction() as connection:
+            return self._put(connection, bucket_name, key, record)
+
+    @staticmethod
+    def _release(
+        connection, bucket_name: str, key: str, keep: str = None
+    ) -> Optional[str]:
+        """Forgets the parts behind a manifest object, returning its manifest
+
+        Nothing is released if the object's manifest is `keep`.
+        """
+
+        row = connection.execute(
+            "SELECT manifest FROM objects WHERE bucket = ? AND key = ?",
+            (bucket_name, key),
+        ).fetchone()
+
+        if row is not None and row[0] is not None and row[0] != keep:
+            connection.execute("DELETE FROM parts WHERE upload_id = ?", (row[0],))
+
+            return row[0]
+
+    @classmethod
+    def _put(cls, connection, bucket_name: str, key: str, record: Metadata):
+        released = cls._release(connection, bucket_name, key, record.manifest)
+
+        connection.execute(
+            "INSERT OR REPLACE INTO objects "
+            f"(bucket, {COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                bucket_name,
+                key,
+                record.size,
+                record.last_modified,
+                record.etag,
+                record.content_type,
+                json.dumps(record.metadata),
+                record.manifest,
+                record.segment,
+                record.position,
+            ),
+        )
+
+        return released
+
+    def delete(self, bucket_name: str, key: str) -> Optional[str]:
+        """Forgets an object, returning its manifest if it had one"""
+
+        with self.transaction() as connection:
+            released = self._release(connection, bucket_name, key)
+
+            connection.execute(
+                "DELETE FROM objects WHERE bucket = ? AND key = ?", (bucket_name, key)
+            )
+
+            return released
+
+    def delete_many(self, bucket_name: str, keys: Iterable[str]) -> List[str]:
+        """Forgets a batch of objects in one transaction, returning their manifests"""
+
+        keys = list(keys)
+
+        with self.transaction() as connection:
+            released = [
+                manifest
+                for manifest in (
+                    self._release(connection, bucket_name, key) for key in keys
+                )
+                if manifest is not None
+            ]
+
+            connection.executemany(
+                "DELETE FROM objects WHERE bucket = ? AND key = ?",
+                ((bucket_name, key) for key in keys),
+            )
+
+            return released
+
+    def drop(self, bucket_name: str) -> List[str]:
+        """Forgets every object in a bucket, returning their manifests"""
+
+        with self.transaction() as connection:
+            released = [
+                manifest
+                for (manifest,) in connection.execute(
+                    "SELECT manifest FROM objects "
+                    "WHERE bucket = ? AND manifest IS NOT NULL",
+                    (bucket_name,),
+                )
+            ]
+
+            connection.executemany(
+                "DELETE FROM parts WHERE upload_id = ?",
+                ((manifest,) for manifest in released),
+            )
+            connection.execute("DELETE FROM objects WHERE bucket = ?", (bucket_name,))
+
+            return released
+
+    def create_upload(self, upload_id: str, upload: Upload):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT INTO uploads VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    upload_id,
+                    upload.bucket,
+                    upload.key,
+                    upload.initiated,
+                    upload.content_type,
+                    json.dumps(upload.metadata),
+                ),
+            )
+
+    def get_upload(self, upload_id: str) -> Optional[Upload]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT bucket, key, initiated, content_type, metadata FROM uploads "
+                "WHERE upload_id = ?",
+                (upload_id,),
+            )
+            .fetchone()
+        )
+
+        if row is not None:
+            bucket, key, initiated, content_type, metadata = row
+
+            return Upload(bucket, key, initiated, content_type, json.loads(metadata))
+
+    def put_part(self, upload_id: str, part: Part):
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO parts VALUES (?, ?, ?, ?, ?)",
+                (upload_id, *part),
+            )
+
+    def list_parts(self, upload_id: str, after: int = 0, limit: int = -1) -> List[Part]:
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT part_number, size, etag, last_modified FROM parts "
+                "WHERE upload_id = ? AND part_number > ? "
+                "ORDER BY part_number LIMIT ?",
+                (upload_id, after, limit),
+            )
+            .fetchall()
+        )
+
+        return [Part(*row) for row in rows]
+
+    def delete_upload(self, upload_id: str):
+        with self.transaction() as connection:
+            self._delete_upload(connection, upload_id)
+
+    @staticmethod
+    def _delete_upload(connection, upload_id: str):
+        connection.execute("DELETE FROM parts WHERE upload_id = ?", (upload_id,))
+        connection.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+
+    def complete_upload(
+        self,
+        upload_id: str,
+        bucket_name: str,
+        key: str,
+        record: Metadata,
+        unused_parts: Iterable[int] = (),
+    ) -> Optional[str]:
+        """Records the assembled object and forgets the upload, atomically
+
+        A manifest object keeps the rows of the parts it is made of, less any
+        `unused_parts`. Returns the manifest of the object replaced, if any.
+        """
+
+        with self.transaction() as connection:
+            released = self._put(connection, bucket_name, key, record)
+
+            if record.manifest == upload_id:
+                connection.executemany(
+                    "DELETE FROM parts WHERE upload_id = ? AND part_number = ?",
+                    ((upload_id, part_number) for part_number in unused_parts),
+                )
+                connection.execute(
+                    "DELETE FROM uploads WHERE upload_id = ?", (upload_id,)
+                )
+            else:
+                self._delete_upload(connection, upload_id)
+
+            return released
+
+    def segment_usage(self) -> Dict[int, int]:
+        """The bytes still referenced in each segment, by segment"""
+
+        return dict(
+            self._connection().execute(
+                "SELECT segment, SUM(size) FROM objects "
+                "WHERE segment IS NOT NULL GROUP BY segment"
+            )
+        )
+
+    def segment_entries(self, segment: int) -> List[Tuple[str, str, int, int]]:
+        """The (bucket, key, position, size) of every object packed in `segment`"""
+
+        return (
+            self._connection()
+            .execute(
+                "SELECT bucket, key, position, size FROM objects WHERE segment = ?",
+                (segment,),
+            )
+            .fetchall()
+        )
+
+    def move_entries(self, moves: Iterable[Tuple[str, str, int, int, int, int]]):
+        """Points packed objects at copies of their data, in one transaction
+
+        Each move is (bucket, key, segment, position, new segment, new
+        position). Objects no longer at (segment, position), because they
+        were overwritten or deleted meanwhile, are left alone.
+        """
+
+        with self.transaction() as connection:
+            connection.executemany(
+                "UPDATE objects SET segment = ?, position = ? "
+                "WHERE bucket = ? AND key = ? AND segment = ? AND position = ?",
+                ((*move[4:], *move[:4]) for move in moves),
+            )
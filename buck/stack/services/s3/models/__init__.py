@@ -1,3 +1,5 @@
 from .bucket import Bucket
 from .object import Object
+from .prefix import CommonPrefix
 from .region import Region
+from .upload import MultipartUpload, Part
@@ -1,11 +1,8 @@
-from ..types import BucketName, DateTime
+from ..types import DateTime
 
-# from ..types import BucketName
-# from .datetime import DateTime
 from .region import Region
 from . import base
 
-# from . import validation
 from ....user import StackUser
 from typing import Union
 
@@ -13,13 +10,12 @@ import datetime
 
 
 class Bucket(base.BaseModel):
+    __slots__ = ("name", "region", "_creation_date", "owner")
+
     name: str
     region: Region
-    arn: str
-    creation_date: DateTime
     owner: Union[StackUser, None]
 
-    # @validation.validate_arguments
     def __init__(
         self,
         name: str,
@@ -28,14 +24,23 @@ class Bucket(base.BaseModel):
         owner: Union[StackUser, None],
     ):
         super().__init__(
-            name=str(BucketName(name)),
+            name=name,
             region=region,
-            arn=f"arn:aws:s3::{name!s}",
-            creation_date=DateTime.fromdatetime(creation_date),
+            _creation_date=creation_date,
             owner=owner,
         )
 
+    @property
+    def arn(self) -> str:
+        return f"arn:aws:s3::{self.name!s}"
+
+    @property
+    def creation_date(self) -> DateTime:
+        return DateTime.fromdatetime(self._creation_date)
+
     def __repr__(self):
         return super().__repr__(
-            name=self.name, region=self.region.code, owner=self.owner.name
+            name=self.name,
+            region=self.region.code,
+            owner=self.owner and self.owner.name,
         )
@@ -1,37 +1,59 @@
-from ..types import ObjectKey, DateTime
+from ..types import DateTime
 
-# from ..types import ObjectKey
-# from .datetime import DateTime
 from .bucket import Bucket
 from . import base
 
-# from . import validation
+from typing import Dict, Union
 
 import datetime
 
 
 class Object(base.BaseModel):
+    __slots__ = (
+        "key",
+        "bucket",
+        "_last_modified_date",
+        "size",
+        "etag",
+        "content_type",
+        "metadata",
+    )
+
     bucket: Bucket
     key: str
-    arn: str
-    last_modified_date: DateTime
+    size: Union[int, None]
+    etag: Union[str, None]
+    content_type: Union[str, None]
+    metadata: Dict[str, str]
 
-    # @validation.validate_arguments
     def __init__(
         self,
         key: str,
         bucket: Bucket,
         last_modified_date: datetime.datetime,
+        size: Union[int, None] = None,
+        etag: Union[str, None] = None,
+        content_type: Union[str, None] = None,
+        metadata: Union[Dict[str, str], None] = None,
     ):
         super().__init__(
-            key=str(ObjectKey(key)),
+            key=key,
             bucket=bucket,
-            arn=f"{bucket.arn!s}:{key!s}",
-            # last_modified_date = DateTime.fromdatetime(last_modified_date),
-            # last_modified_date = DateTime(last_modified_date),
-            last_modified_date=DateTime.fromdatetime(last_modified_date),
+            _last_modified_date=last_modified_date,
+            size=size,
+            etag=etag,
+            content_type=content_type,
+            metadata=metadata or {},
         )
 
+    @property
+    def arn(self) -> str:
+        return f"{self.bucket.arn!s}:{self.key!s}"
+
+    @property
+    def last_modified_date(self) -> DateTime:
+        return DateTime.fromdatetime(self._last_modified_date)
+
     def __repr__(self):
         return super().__repr__(
             key=self.key,
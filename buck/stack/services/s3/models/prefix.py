@@ -0,0 +1,10 @@
+from . import base
+
+
+class CommonPrefix(base.BaseModel):
+    __slots__ = ("prefix",)
+
+    prefix: str
+
+    def __init__(self, prefix: str):
+        super().__init__(prefix=prefix)
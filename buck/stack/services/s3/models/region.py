@@ -6,6 +6,8 @@ from typing import Union
 
 
 class Region(base.BaseModel):
+    __slots__ = ("code", "name")
+
     code: str
     name: str
 
@@ -28,8 +30,6 @@ class Region(base.BaseModel):
 
     def __repr__(self):
         return super().__repr__(
-            {
-                "code": self.code,
-                "name": self.name,
-            }
+            code=self.code,
+            name=self.name,
         )
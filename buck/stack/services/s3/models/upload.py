@@ -0,0 +1,65 @@
+from ..types import DateTime
+
+from .bucket import Bucket
+from . import base
+
+import datetime
+
+
+class MultipartUpload(base.BaseModel):
+    __slots__ = ("upload_id", "key", "bucket", "_initiated_date")
+
+    upload_id: str
+    key: str
+    bucket: Bucket
+
+    def __init__(
+        self,
+        upload_id: str,
+        key: str,
+        bucket: Bucket,
+        initiated_date: datetime.datetime,
+    ):
+        super().__init__(
+            upload_id=upload_id,
+            key=key,
+            bucket=bucket,
+            _initiated_date=initiated_date,
+        )
+
+    @property
+    def initiated_date(self) -> DateTime:
+        return DateTime.fromdatetime(self._initiated_date)
+
+    def __repr__(self):
+        return super().__repr__(
+            upload_id=self.upload_id,
+            key=self.key,
+            bucket=self.bucket.name,
+        )
+
+
+class Part(base.BaseModel):
+    __slots__ = ("part_number", "etag", "size", "_last_modified_date")
+
+    part_number: int
+    etag: str
+    size: int
+
+    def __init__(
+        self,
+        part_number: int,
+        etag: str,
+        size: int,
+        last_modified_date: datetime.datetime,
+    ):
+        super().__init__(
+            part_number=part_number,
+            etag=etag,
+            size=size,
+            _last_modified_date=last_modified_date,
+        )
+
+    @property
+    def last_modified_date(self) -> DateTime:
+        return DateTime.fromdatetime(self._last_modified_date)
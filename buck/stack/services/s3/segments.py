@@ -0,0 +1,285 @@
+from . import durability
+from . import files
+from .metadata import MetadataStore
+
+import contextlib
+import io
+import logging
+import os
+import threading
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Appends roll over to a new segment once the active one reaches this size
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+# Sealed segments with less than this share of their bytes live are rewritten
+COMPACT_RATIO = 0.5
+
+COMPACT_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class Segment(object):
+    """An open segment file, closed once nothing references it any more
+
+    Readers hold on to the segment they read from, so it stays readable after
+    compaction has removed it.
+    """
+
+    __slots__ = ("id", "file", "writers")
+
+    def __init__(self, id: int, path: str, create: bool = False):
+        flags = os.O_RDWR | (os.O_CREAT | os.O_EXCL if create else 0)
+
+        self.id = id
+        self.file = io.FileIO(os.open(path, flags, 0o644), "r+")
+        # Appends written but maybe not recorded yet
+        self.writers = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: id={self.id!r}>"
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+
+class SegmentReader(files.RangeReader):
+    """Read-only, seekable file over one object packed in a segment
+
+    Reads are preads on the segment's shared descriptor, so opening a reader
+    costs no system calls and closing one leaves the segment open.
+    """
+
+    def __init__(self, segment: Segment, position: int, size: int):
+        super().__init__(size)
+
+        self.segment = segment
+        self.position = position
+
+    def slices(self, offset: int, count: int) -> Iterator[Tuple[io.FileIO, int, int]]:
+        """Yields the (segment file, offset, count) run backing `count` bytes"""
+
+        count = min(count, self.size - offset)
+
+        if count > 0:
+            yield self.segment.file, self.position + offset, count
+
+    def pread(self, view: memoryview, offset: int) -> int:
+        return os.preadv(self.segment.fileno(), [view], self.position + offset)
+
+
+class Segments(object):
+    """Append-only segment files that small objects are packed into
+
+    Each object is written once, at the end of the active segment, and found
+    again by the (segment, position, size) recorded in the metadata store.
+    Appends roll over to a new segment at `segment_size`, and the first
+    append after a start begins a new one, past whatever a crash left at the
+    end of the last.
+    """
+
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+
+        self._lock = threading.Lock()
+        self._segments: Dict[int, Segment] = {}
+
+        self._active: Optional[Segment] = None
+        self._end = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: directory={self.directory!r}>"
+
+    def _path(self, id: int) -> str:
+        return os.path.join(self.directory, f"{id:08d}")
+
+    def _create(self) -> Segment:
+        id = max(self.ids(), default=0) + 1
+
+        segment = self._segments[id] = Segment(id, self._path(id), create=True)
+
+        return segment
+
+    def ids(self) -> List[int]:
+        return sorted(
+            int(name) for name in os.listdir(self.directory) if name.isdigit()
+        )
+
+    def sealed(self) -> List[int]:
+        """The segments no longer appended to, nor waiting for appends to be recorded"""
+
+        with self._lock:
+            busy = {id for id, segment in self._segments.items() if segment.writers}
+
+            if self._active is not None:
+                busy.add(self._active.id)
+
+            return [id for id in self.ids() if id not in busy]
+
+    def size(self, id: int) -> int:
+        return os.path.getsize(self._path(id))
+
+    def get(self, id: int) -> Segment:
+        with self._lock:
+            segment = self._segments.get(id)
+
+            if segment is None:
+                segment = self._segments[id] = Segment(id, self._path(id))
+
+            return segment
+
+    def open(self, id: int, position: int, size: int) -> SegmentReader:
+        return SegmentReader(self.get(id), position, size)
+
+    @contextlib.contextmanager
+    def append(self, data: bytes) -> Iterator[Tuple[Segment, int]]:
+        """Writes `data` to the end of the active segment, yielding where
+
+        Concurrent appends reserve their ranges under a lock and write them
+        in parallel. The segment isn't `sealed` until the block, which should
+        record where the data is, has exited.
+        """
+
+        with self._lock:
+            if self._active is None or (
+                self._end and self._end + len(data) > self.segment_size
+            ):
+                self._active = self._create()
+                self._end = 0
+
+            segment, position = self._active, self._end
+
+            segment.writers += 1
+            self._end += len(data)
+
+        try:
+            view = memoryview(data)
+            written = 0
+
+            while written < len(view):
+                written += os.pwrite(
+                    segment.fileno(), view[written:], position + written
+                )
+
+            yield segment, position
+        finally:
+            with self._lock:
+                segment.writers -= 1
+
+    def seal(self):
+        """Leaves the active segment for compaction, appending to a new one"""
+
+        with self._lock:
+            self._active = None
+
+    def remove(self, id: int):
+        """Deletes a segment; readers already holding it can finish"""
+
+        with self._lock:
+            self._segments.pop(id, None)
+
+        os.remove(self._path(id))
+
+
+class Compactor(object):
+    """Rewrites sealed segments left mostly garbage, in a background thread
+
+    Deletes and overwrites leave dead ranges behind in segments. Once less
+    than `ratio` of a sealed segment is live, its live objects are copied to
+    the active segment, repointed in one transaction and the segment removed.
+    Copies are synced to disk, whatever the durability policy, before the
+    segment they came from is gone.
+    """
+
+    def __init__(
+        self,
+        segments: Segments,
+        metadata: MetadataStore,
+        commit_lock: threading.Lock,
+        interval: float = COMPACT_INTERVAL,
+        ratio: float = COMPACT_RATIO,
+    ):
+        self.segments = segments
+        self.metadata = metadata
+        self.commit_lock = commit_lock
+        self.interval = interval
+        self.ratio = ratio
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__name__}:"
+            f" interval={self.interval!r} ratio={self.ratio!r}>"
+        )
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="buck-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.compact()
+            except Exception:
+                logger.exception("Segment compaction failed")
+
+    def compact(self) -> int:
+        """Rewrites every sealed segment below `ratio` live, returning bytes freed"""
+
+        usage = self.metadata.segment_usage()
+        freed = 0
+
+        for id in self.segments.sealed():
+            size = self.segments.size(id)
+            live = usage.get(id, 0)
+
+            if size and live >= size * self.ratio:
+                continue
+
+            self._rewrite(id)
+
+            freed += size - live
+
+        return freed
+
+    def _rewrite(self, id: int):
+        source = self.segments.get(id)
+        copies = set()
+        moves = []
+
+        for bucket, key, position, size in self.metadata.segment_entries(id):
+            data = os.pread(source.fileno(), size, position)
+
+            # Only this thread moves objects, so the copies can't be compacted
+            # before they are recorded
+            with self.segments.append(data) as (segment, new_position):
+                copies.add(segment)
+                moves.append((bucket, key, id, position, segment.id, new_position))
+
+        for segment in copies:
+            durability.fsync(segment.fileno())
+
+        durability.fsync(self.segments.directory)
+
+        # Writes only ever go to the active segment, so once these moves are
+        # committed nothing points here any more
+        with self.commit_lock:
+            self.metadata.move_entries(moves)
+
+        if self.metadata.journal is not None:
+            durability.fsync(self.metadata.journal)
+
+        self.segments.remove(id)
@@ -1,17 +1,151 @@
 from fs.base import FS
 import fs
+import fs.errors
+import os
+import threading
+
+from typing import Any, Optional
 
 from .service_session import SimpleStorageServiceSession
+from .durability import POLICIES, NoDurability
+from .index import Index
+from .layouts import LAYOUTS, NestedLayout, ShardedLayout
+from .manifests import ManifestReaders
+from .maps import MapCache
+from .metadata import MetadataStore
+from .segments import Compactor, Segments
 
 from ... import service
 
 
+CHUNK_SIZE = 1024 * 1024
+
+# Internal state lives under a directory that can never be a valid bucket name
+INTERNAL_DIRECTORY = ".buck"
+UPLOADS_DIRECTORY = f"{INTERNAL_DIRECTORY}/uploads"
+OBJECTS_DIRECTORY = f"{INTERNAL_DIRECTORY}/objects"
+TEMP_DIRECTORY = f"{INTERNAL_DIRECTORY}/tmp"
+SEGMENTS_DIRECTORY = f"{INTERNAL_DIRECTORY}/segments"
+METADATA_FILE = "metadata.sqlite3"
+
+
 class SimpleStorageService(service.StackService):
     fs: FS
+    chunk_size: int
+    index: Index
+    metadata: MetadataStore
+    layout: NestedLayout
+    uploads_directory: str
+    temp_directory: str
+    multipart_manifests: bool
+    manifest_readers: ManifestReaders
+    durability: NoDurability
+    # Objects up to this size are packed into segments; 0 packs none
+    pack_size: int
+    segments: Optional[Segments]
+    compactor: Optional[Compactor]
+    # Hot object files kept memory-mapped for reads, if any
+    maps: Optional[MapCache]
+    # Held while a write is renamed into place and recorded, or deleted
+    commit_lock: Any
+
+    def __init__(
+        self,
+        path: str = None,
+        chunk_size: int = None,
+        multipart_manifests: bool = False,
+        layout: str = None,
+        durability: str = None,
+        pack_size: int = 0,
+        map_cache: int = 0,
+    ):
+        filesystem = fs.open_fs(path or "mem://")
+
+        filesystem.makedirs(UPLOADS_DIRECTORY, recreate=True)
+
+        # Writes in progress live in the temporary directory until they are
+        # renamed into place, so anything found there now was cut short
+        if filesystem.isdir(TEMP_DIRECTORY):
+            filesystem.removetree(TEMP_DIRECTORY)
+
+        filesystem.makedir(TEMP_DIRECTORY)
+
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"Chunk size must be positive, not {chunk_size!r}")
+
+        if layout is not None and layout not in LAYOUTS:
+            raise ValueError(
+                f"Unknown layout {layout!r}, expected one of {list(LAYOUTS)}"
+            )
+
+        if durability is not None and durability not in POLICIES:
+            raise ValueError(
+                f"Unknown durability {durability!r}, expected one of {list(POLICIES)}"
+            )
+
+        metadata = MetadataStore(self._metadata_path(filesystem))
+
+        policy = POLICIES[durability or NoDurability.name]()
+
+        if policy.durable and metadata.journal is None:
+            raise ValueError(f"In-memory storage can't be {policy.name!r} durable")
+
+        commit_lock = threading.Lock()
+        segments = compactor = None
+
+        if pack_size and metadata.journal is None:
+            raise ValueError("In-memory storage can't pack objects in segments")
+
+        if map_cache and metadata.journal is None:
+            raise ValueError("In-memory storage can't be memory-mapped")
+
+        # Objects packed before stay readable, and compacted, with packing off
+        if metadata.journal is not None:
+            filesystem.makedirs(SEGMENTS_DIRECTORY, recreate=True)
+
+            segments = Segments(filesystem.getsyspath(SEGMENTS_DIRECTORY))
+            compactor = Compactor(segments, metadata, commit_lock)
+
+        # A store keeps the layout it was created with; stores with objects
+        # from before layouts could be chosen are nested
+        default = layout if metadata.is_empty() else None
+        stored = metadata.setting("layout", default or NestedLayout.name)
+
+        if layout is not None and layout != stored:
+            raise ValueError(f"Storage uses the {stored!r} layout, not {layout!r}")
+
+        if stored == ShardedLayout.name:
+            filesystem.makedirs(OBJECTS_DIRECTORY, recreate=True)
+
+            object_layout = ShardedLayout(filesystem, metadata, OBJECTS_DIRECTORY)
+        else:
+            object_layout = NestedLayout(filesystem, metadata)
 
-    def __init__(self, path: str = None):
         super().__init__(
             name="s3",
             session=SimpleStorageServiceSession,
-            fs=fs.open_fs(path or "mem://"),
+            fs=filesystem,
+            chunk_size=chunk_size or CHUNK_SIZE,
+            index=Index(),
+            metadata=metadata,
+            layout=object_layout,
+            uploads_directory=UPLOADS_DIRECTORY,
+            temp_directory=TEMP_DIRECTORY,
+            multipart_manifests=multipart_manifests,
+            manifest_readers=ManifestReaders(),
+            durability=policy,
+            pack_size=pack_size,
+            segments=segments,
+            compactor=compactor,
+            maps=MapCache(map_cache) if map_cache else None,
+            commit_lock=commit_lock,
         )
+
+    @staticmethod
+    def _metadata_path(filesystem: FS):
+        try:
+            directory = filesystem.getsyspath(INTERNAL_DIRECTORY)
+        except fs.errors.NoSysPath:
+            return None
+
+        return os.path.join(directory, METADATA_FILE)
@@ -3,6 +3,8 @@ from .... import exceptions
 
 import abc
 
+from typing import Iterable, List, Tuple, Union
+
 
 def generator(iterable):
     for item in iterable:
@@ -10,6 +12,8 @@ def generator(iterable):
 
 
 class SimpleStorageServiceSession(service_session.StackServiceSession, abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def list_buckets(self, **kwargs):
         return generator(())
@@ -32,7 +36,11 @@ class SimpleStorageServiceSession(service_session.StackServiceSession, abc.ABC):
 
     @abc.abstractmethod
     def put_object(
-        self, bucket_name: str, object_key: str, object_data: bytes, **kwargs
+        self,
+        bucket_name: str,
+        object_key: str,
+        object_data: Union[bytes, Iterable[bytes]],
+        **kwargs
     ):
         pass
 
@@ -40,6 +48,10 @@ class SimpleStorageServiceSession(service_session.StackServiceSession, abc.ABC):
     def get_object(self, bucket_name: str, object_key: str, **kwargs):
         raise exceptions.S3Error("NoSuchKey")
 
+    @abc.abstractmethod
+    def open_object(self, bucket_name: str, object_key: str, **kwargs):
+        raise exceptions.S3Error("NoSuchKey")
+
     @abc.abstractmethod
     def list_objects(self, bucket_name: str, **kwargs):
         return generator(())
@@ -48,6 +60,71 @@ class SimpleStorageServiceSession(service_session.StackServiceSession, abc.ABC):
     def delete_object(self, bucket_name: str, object_key: str, **kwargs):
         pass
 
+    @abc.abstractmethod
+    def delete_objects(self, bucket_name: str, object_keys: List[str], **kwargs):
+        pass
+
     @abc.abstractmethod
     def head_object(self, bucket_name: str, object_key: str, **kwargs):
         raise exceptions.S3Error("NoSuchKey")
+
+    @abc.abstractmethod
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        source_bucket_name: str,
+        source_object_key: str,
+        **kwargs
+    ):
+        pass
+
+    @abc.abstractmethod
+    def create_multipart_upload(self, bucket_name: str, object_key: str, **kwargs):
+        pass
+
+    @abc.abstractmethod
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        object_data: Union[bytes, Iterable[bytes]],
+        **kwargs
+    ):
+        pass
+
+    @abc.abstractmethod
+    def upload_part_copy(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        source_bucket_name: str,
+        source_object_key: str,
+        **kwargs
+    ):
+        pass
+
+    @abc.abstractmethod
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Tuple[int, str]],
+        **kwargs
+    ):
+        raise exceptions.S3Error("NoSuchUpload")
+
+    @abc.abstractmethod
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str, **kwargs
+    ):
+        pass
+
+    @abc.abstractmethod
+    def list_parts(self, bucket_name: str, object_key: str, upload_id: str, **kwargs):
+        return generator(())
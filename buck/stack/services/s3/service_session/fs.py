@@ -1,16 +1,38 @@
 from . import abc
+from .. import content_types
+from .. import etags
+from .. import files
+from .. import manifests
 from .. import models
+from .. import types
+from ..metadata import Metadata, Part, Upload
 from .... import exceptions
+from .... import utils
 
+import contextlib
+import datetime
+import errno
+import functools
 import fs
-import pathlib
+import fs.errors
+import fs.path
+import itertools
+import os
+import time
 
 from fs.base import FS
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 
 class SimpleStorageServiceSession(abc.SimpleStorageServiceSession):
+    __slots__ = ("fs",)
+
     fs: FS
     region: models.Region = models.Region("us-east-2")
+    list_batch_size: int = 100
+    min_part_size: int = 5 * 1024 * 1024
+    max_part_number: int = 10000
+    max_delete_keys: int = 1000
 
     def __init__(self, *, service, stack, user):
         super().__init__(
@@ -24,11 +46,16 @@ class SimpleStorageServiceSession(abc.SimpleStorageServiceSession):
         return self.fs.isdir(name)
 
     def _get_bucket(self, name: str):
-        if self._bucket_exists(name):
+        try:
+            details = self.fs.getdetails(name)
+        except fs.errors.ResourceNotFound:
+            return
+
+        if details.is_dir:
             return models.Bucket(
                 name=name,
                 region=self.region,
-                creation_date=self.fs.getdetails(name).modified,
+                creation_date=details.modified,
                 owner=None,
             )
 
@@ -38,28 +65,272 @@ class SimpleStorageServiceSession(abc.SimpleStorageServiceSession):
                 return bucket
 
     def _object_exists(self, bucket_name: str, object_key: str):
-        object_path = str(pathlib.Path(bucket_name).joinpath(object_key))
-
-        return self.fs.isfile(object_path)
+        return self.fs.isfile(self.service.layout.path(bucket_name, object_key))
 
     def _get_object(self, bucket_name: str, object_key: str):
         if self._object_exists(bucket_name, object_key):
-            object_path = str(pathlib.Path(bucket_name).joinpath(object_key))
+            object_path = self.service.layout.path(bucket_name, object_key)
 
             file_details = self.fs.getdetails(object_path)
 
             return models.Object(
                 key=object_key,
-                bucket=bucket,
+                bucket=self._get_bucket(bucket_name),
                 last_modified_date=file_details.modified,
             )
 
+    def _object(self, bucket: models.Bucket, object_key: str, record: Metadata):
+        return models.Object(
+            key=object_key,
+            bucket=bucket,
+            last_modified_date=datetime.datetime.fromtimestamp(
+                record.last_modified, datetime.timezone.utc
+            ),
+            size=record.size,
+            etag=record.etag,
+            content_type=record.content_type,
+            metadata=record.metadata,
+        )
+
+    def _metadata(self, bucket_name: str, object_key: str):
+        if record := self.service.metadata.get(bucket_name, object_key):
+            return record
+
+        return self._backfill(bucket_name, object_key)
+
+    def _backfill(self, bucket_name: str, object_key: str):
+        """Records metadata for an object written before the store existed
+
+        This reads the object once in full, to compute its ETag. The file is
+        found and opened under the commit lock, but read without it; the
+        record is only added if the object is still that file, and has not
+        been recorded by a write meanwhile.
+        """
+
+        path = self.service.layout.path(bucket_name, object_key)
+
+        while True:
+            with self.service.commit_lock:
+                if record := self.service.metadata.get(bucket_name, object_key):
+                    return record
+
+                try:
+                    identity = self._identity(path)
+
+                    if identity is None:
+                        return
+
+                    file = self.fs.open(path, "rb")
+                except fs.errors.ResourceNotFound:
+                    return
+
+            content_type = content_types.from_extension(object_key)
+            hasher = etags.hasher()
+
+            with file:
+                while chunk := file.read(self.service.chunk_size):
+                    if content_type is None:
+                        content_type = content_types.from_data(chunk)
+
+                    hasher.update(chunk)
+
+            _, _, size, modified = identity
+
+            record = Metadata(
+                size=size,
+                last_modified=modified.timestamp() if modified else time.time(),
+                etag=hasher.hexdigest(),
+                content_type=content_type or content_types.DEFAULT_CONTENT_TYPE,
+            )
+
+            with self.service.commit_lock:
+                if current := self.service.metadata.get(bucket_name, object_key):
+                    return current
+
+                try:
+                    if self._identity(path) != identity:
+                        # Replaced behind the store's back while it was read
+                        continue
+                except fs.errors.ResourceNotFound:
+                    return
+
+                self.service.metadata.put(bucket_name, object_key, record)
+
+            return record
+
+    def _identity(self, path: str):
+        """The device, inode, size and modification time of a file, or None
+
+        Stores without inodes, in memory, go by the size and time alone.
+        """
+
+        info = self.fs.getinfo(path, namespaces=["details", "stat"])
+
+        if not info.is_file:
+            return
+
+        return (
+            info.get("stat", "st_dev"),
+            info.get("stat", "st_ino"),
+            info.size,
+            info.modified,
+        )
+
+    def _part(self, part: Part):
+        return models.Part(
+            part_number=part.part_number,
+            etag=part.etag,
+            size=part.size,
+            last_modified_date=datetime.datetime.fromtimestamp(
+                part.last_modified, datetime.timezone.utc
+            ),
+        )
+
+    def _upload_path(self, upload_id: str, part_number: int = None) -> str:
+        path = fs.path.join(self.service.uploads_directory, upload_id)
+
+        if part_number is not None:
+            path = fs.path.join(path, f"{part_number:05d}")
+
+        return path
+
+    def _open_manifest(self, manifest: str):
+        """Opens a manifest object, whose parts are kept until it is closed
+
+        Called under the commit lock, so an overwrite or delete of the object
+        either comes first, or finds the reader counted and leaves the parts.
+        """
+
+        def build():
+            parts = self.service.metadata.list_parts(manifest)
+
+            return manifests.Manifest(
+                [self._upload_path(manifest, part.part_number) for part in parts],
+                [part.size for part in parts],
+            )
+
+        return manifests.ManifestReader(
+            self.service.manifest_readers.acquire(manifest, build),
+            functools.partial(self.fs.open, mode="rb"),
+            functools.partial(self._close_manifest, manifest),
+        )
+
+    def _close_manifest(self, manifest: str):
+        if self.service.manifest_readers.release(manifest):
+            self._remove_parts(manifest)
+
+    def _open(self, bucket_name: str, object_key: str, record: Metadata):
+        if record.manifest is not None:
+            return self._open_manifest(record.manifest)
+
+        if record.segment is not None:
+            return self.service.segments.open(
+                record.segment, record.position, record.size
+            )
+
+        path = self.service.layout.path(bucket_name, object_key)
+
+        try:
+            if self.service.maps is not None:
+                return self.service.maps.open(
+                    path, functools.partial(self.fs.open, path, "rb")
+                )
+
+            return self.fs.open(path, "rb")
+        except (fs.errors.ResourceNotFound, fs.errors.FileExpected):
+            self._release(self.service.metadata.delete(bucket_name, object_key))
+
+            raise exceptions.S3Error("NoSuchKey")
+
+    def _check_bucket(self, bucket_name: str):
+        """Raises NoSuchBucket unless the bucket exists, under the commit lock"""
+
+        if not self.fs.isdir(bucket_name):
+            raise exceptions.S3Error("NoSuchBucket")
+
+    def _prune(self, bucket_name: str, object_keys: Iterable[str]):
+        """Removes directories left empty, never while a write is installed"""
+
+        with self.service.commit_lock:
+            self.service.layout.prune(bucket_name, object_keys)
+
+    def _unmap(self, path: str):
+        """Drops the cached map of a file being replaced or removed"""
+
+        if self.service.maps is not None:
+            self.service.maps.discard(path)
+
+    def _release(self, manifest: Optional[str]):
+        """Deletes the part files behind a manifest object that is gone
+
+        Parts still being read are deleted once their last reader is closed.
+        """
+
+        if manifest is not None and self.service.manifest_readers.retire(manifest):
+            self._remove_parts(manifest)
+
+    def _remove_parts(self, manifest: str):
+        if self.fs.isdir(self._upload_path(manifest)):
+            self.fs.removetree(self._upload_path(manifest))
+
+    def _copy(self, source, destination, offset: int, count: int):
+        """Appends part of an opened object to `destination`
+
+        Manifest and packed objects are copied from the files behind them, so
+        the kernel can still move the data.
+        """
+
+        if hasattr(source, "slices"):
+            runs = source.slices(offset, count)
+        else:
+            runs = ((source, offset, count),)
+
+        for file, file_offset, file_count in runs:
+            files.copy(
+                file, destination, self.service.chunk_size, file_offset, file_count
+            )
+
+    def _get_upload(self, bucket_name: str, object_key: str, upload_id: str):
+        upload = self.service.metadata.get_upload(upload_id)
+
+        if upload is None or (upload.bucket, upload.key) != (bucket_name, object_key):
+            raise exceptions.S3Error("NoSuchUpload")
+
+        return upload
+
+    def _key_path(self, bucket_name: str, object_key: str) -> str:
+        """Path of an object named in a batch, or S3Error if none can be"""
+
+        return self.service.layout.path(bucket_name, object_key)
+
+    def _index(self, bucket_name: str):
+        return self.service.index.get(
+            bucket_name, lambda: self.service.layout.keys(bucket_name)
+        )
+
+    def _head_bucket(self, name: str):
+        if bucket := self._get_owned_bucket(name):
+            return bucket
+
+        raise exceptions.S3Error("NoSuchBucket")
+
+    def _head_object(self, bucket_name: str, object_key: str):
+        bucket = self._head_bucket(bucket_name)
+
+        if record := self._metadata(bucket_name, object_key):
+            return self._object(bucket, object_key, record)
+
+        raise exceptions.S3Error("NoSuchKey")
+
     def list_buckets(self, **kwargs):
         """Returns a list of all buckets owned by the authenticated sender of the request."""
 
         children = self.fs.glob("*/")
 
         for child in children:
+            if types.BucketName.validate(child.info.name) is not None:
+                continue
+
             if bucket := self._get_owned_bucket(child.info.name):
                 yield bucket
 
@@ -74,76 +345,842 @@ class SimpleStorageServiceSession(abc.SimpleStorageServiceSession):
 
     def delete_bucket(self, name: str, **kwargs):
         if bucket := self._get_owned_bucket(name):
-            self.fs.removedir(bucket.name)
+            # Objects are installed under the lock, and only into buckets
+            # that still exist, so none can land between the check and drop
+            with self.service.commit_lock:
+                if not self.service.layout.is_empty(bucket.name):
+                    raise exceptions.S3Error("BucketNotEmpty")
+
+                self.fs.removedir(bucket.name)
+
+                self.service.index.drop(bucket.name)
+
+                released = self.service.metadata.drop(bucket.name)
+
+            for manifest in released:
+                self._release(manifest)
 
     def head_bucket(self, name: str, **kwargs):
-        if not self._get_owned_bucket(name):
-            raise exceptions.S3Error("NoSuchBucket")
+        self._head_bucket(name)
+
+    @contextlib.contextmanager
+    def _temporary(self):
+        """Opens a new temporary file, yielding it and its path
+
+        The file is removed if the block raises, and otherwise left for
+        `_install` to rename into place, flushed to disk if writes are durable.
+        """
+
+        path = fs.path.join(self.service.temp_directory, utils.hex_token(16))
+
+        try:
+            with self.fs.open(path, "wb") as file:
+                yield file, path
+
+                if self.service.durability.durable:
+                    file.flush()
+
+                    self.service.durability.sync((file.fileno(),))
+        except BaseException:
+            if self.fs.isfile(path):
+                self.fs.remove(path)
+
+            raise
+
+    def _install(
+        self,
+        temp_path: str,
+        path: str,
+        record: Callable[[], Any],
+        bucket_name: str = None,
+        upload_id: str = None,
+    ):
+        """Renames a temporary file over `path` and records it with `record()`
+
+        Readers of `path` see the old file or the new one, never part of it.
+        Both steps happen under the commit lock, so concurrent writers of a
+        path can't leave one's data behind another's metadata. With durable
+        writes, this returns once the rename and the record are on disk.
+
+        Objects are installed with their `bucket_name`, and parts with their
+        `upload_id`, and fail if the bucket was deleted, or the upload
+        completed or aborted, meanwhile rather than outlive it.
+        """
+
+        try:
+            with self.service.commit_lock:
+                if upload_id is not None:
+                    if self.service.metadata.get_upload(upload_id) is None:
+                        raise exceptions.S3Error("NoSuchUpload")
+
+                    self._rename(temp_path, path)
+                else:
+                    self._check_bucket(bucket_name)
+
+                    try:
+                        self._rename(temp_path, path)
+                    except (FileNotFoundError, fs.errors.ResourceNotFound):
+                        # A delete or overwrite pruned the parents prepared for it
+                        self.fs.makedirs(fs.path.dirname(path), recreate=True)
+                        self._rename(temp_path, path)
+
+                self._unmap(path)
+
+                result = record()
+        except BaseException:
+            if self.fs.isfile(temp_path):
+                self.fs.remove(temp_path)
+
+            raise
+
+        if self.service.durability.durable:
+            # The rename lives in the directory, which may itself be new
+            directories = fs.path.recursepath(fs.path.dirname(path))
+
+            self.service.durability.sync(
+                [*map(self.fs.getsyspath, directories), self.service.metadata.journal]
+            )
+
+        return result
+
+    def _rename(self, temp_path: str, path: str):
+        """Renames a temporary file over `path` in one step
+
+        `FS.move` falls back to copying into the destination in place when
+        the rename fails, which readers and maps of it would see torn. A
+        store whose buckets are on another file system than its temporary
+        files can't work at all, so that fails rather than copying. Stores
+        without system paths, in memory, already move in one step.
+        """
+
+        if not (self.fs.hassyspath(temp_path) and self.fs.hassyspath(path)):
+            self.fs.move(temp_path, path, overwrite=True)
+
+            return
+
+        try:
+            os.replace(self.fs.getsyspath(temp_path), self.fs.getsyspath(path))
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+
+            raise OSError(
+                errno.EXDEV,
+                f"{path!r} is on another file system than the temporary files",
+                self.fs.getsyspath(path),
+            ) from error
+
+    def _write(
+        self,
+        object_data: Union[bytes, Iterable[bytes]],
+        expected_digest: bytes = None,
+    ):
+        """Streams `object_data` to a temporary file
+
+        Returns its path, size, MD5 hasher and head, the start of the first
+        chunk, for content type sniffing.
+        """
+
+        if isinstance(object_data, (bytes, bytearray, memoryview)):
+            object_data = (object_data,)
+
+        hasher = etags.hasher()
+        head = b""
+        size = 0
+
+        with self._temporary() as (file, temp_path):
+            for chunk in object_data:
+                if not head:
+                    head = bytes(chunk[: content_types.SNIFF_SIZE])
+
+                hasher.update(chunk)
+                file.write(chunk)
+
+                size += len(chunk)
+
+            if expected_digest is not None and hasher.digest() != expected_digest:
+                raise exceptions.S3Error("BadDigest")
+
+        return temp_path, size, hasher, head
+
+    def _buffer(self, object_data: Union[bytes, Iterable[bytes]]):
+        """Reads `object_data` in full if it is small enough to pack
+
+        Returns the data, or None and the data still to be streamed.
+        """
+
+        if not self.service.pack_size:
+            return None, object_data
+
+        if isinstance(object_data, (bytes, bytearray, memoryview)):
+            if len(object_data) <= self.service.pack_size:
+                return bytes(object_data), None
+
+            return None, object_data
+
+        chunks = []
+        size = 0
+        remaining = iter(object_data)
+
+        for chunk in remaining:
+            chunks.append(chunk)
+            size += len(chunk)
+
+            if size > self.service.pack_size:
+                return None, itertools.chain(chunks, remaining)
+
+        return b"".join(chunks), None
+
+    def _pack(self, bucket_name: str, object_key: str, data: bytes, record: Metadata):
+        """Appends a small object to a segment and records it there
+
+        Any file the key had is removed along with recording it, under the
+        commit lock. Returns the record and any manifest it replaced.
+        """
+
+        durability = self.service.durability
+
+        with self.service.segments.append(data) as (segment, position):
+            if durability.durable:
+                durability.sync((segment.fileno(), self.service.segments.directory))
+
+            record = record._replace(segment=segment.id, position=position)
+
+            with self.service.commit_lock:
+                self._check_bucket(bucket_name)
+
+                released = self.service.metadata.put(bucket_name, object_key, record)
+                path = self.service.layout.path(bucket_name, object_key)
+
+                self._unmap(path)
+
+                try:
+                    self.fs.remove(path)
+                except (fs.errors.ResourceNotFound, fs.errors.FileExpected):
+                    removed = False
+                else:
+                    removed = True
+
+        if durability.durable:
+            durability.sync((self.service.metadata.journal,))
+
+        if removed:
+            self._prune(bucket_name, (object_key,))
+
+        return record, released
 
     def put_object(
-        self, bucket_name: str, object_key: str, object_data: bytes, **kwargs
+        self,
+        bucket_name: str,
+        object_key: str,
+        object_data: Union[bytes, Iterable[bytes]],
+        content_type: str = None,
+        metadata: Dict[str, str] = None,
+        content_md5: str = None,
+        **kwargs,
     ):
-        self.head_bucket(bucket_name)
+        bucket = self._head_bucket(bucket_name)
 
-        path = pathlib.Path(bucket_name).joinpath(object_key)
+        expected_digest = None
 
-        if self.fs.isdir(str(path)):
-            raise exceptions.S3Error("InvalidRequest")
+        if content_md5 is not None:
+            expected_digest = etags.decode_content_md5(content_md5)
 
-        for parent in map(str, list(path.parents)[-3::-1]):
-            if self.fs.isfile(parent):
-                raise exceptions.S3Error("InvalidRequest")
+        data, object_data = self._buffer(object_data)
+
+        if data is not None:
+            hasher = etags.hasher()
+            hasher.update(data)
+
+            if expected_digest is not None and hasher.digest() != expected_digest:
+                raise exceptions.S3Error("BadDigest")
+
+            record = Metadata(
+                size=len(data),
+                last_modified=time.time(),
+                etag=hasher.hexdigest(),
+                content_type=content_type or content_types.guess(object_key, data),
+                metadata=metadata or {},
+            )
+
+            record, released = self._pack(bucket_name, object_key, data, record)
+        else:
+            path = self.service.layout.prepare(bucket_name, object_key)
+
+            try:
+                temp_path, size, hasher, head = self._write(
+                    object_data, expected_digest
+                )
 
-            if not self.fs.isdir(parent):
-                self.fs.makedir(parent)
+                record = Metadata(
+                    size=size,
+                    last_modified=time.time(),
+                    etag=hasher.hexdigest(),
+                    content_type=content_type or content_types.guess(object_key, head),
+                    metadata=metadata or {},
+                )
+
+                released = self._install(
+                    temp_path,
+                    path,
+                    lambda: self.service.metadata.put(bucket_name, object_key, record),
+                    bucket_name,
+                )
+            except BaseException:
+                # Any previous object is untouched, but new parents may be empty
+                self._prune(bucket_name, (object_key,))
+
+                raise
+
+        self.service.index.add(bucket_name, object_key)
 
-        with self.fs.open(str(path), "wb") as file:
-            file.write(object_data)
+        self._release(released)
+
+        return self._object(bucket, object_key, record)
 
     def get_object(self, bucket_name: str, object_key: str, **kwargs):
-        self.head_object(bucket_name, object_key)
+        return self.open_object(bucket_name, object_key)[1]
 
-        path = str(pathlib.Path(bucket_name).joinpath(object_key))
+    def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        precondition: Callable[[models.Object], bool] = None,
+        **kwargs,
+    ):
+        """Returns an object and its opened data, which always match
 
-        return self.fs.open(path, "rb")
+        Writes are renamed into place and recorded under the commit lock, so
+        the two are read under it too. The data itself is read without it.
 
-    """
-    def list_objects(self, bucket_name: str, **kwargs):
-        bucket = self.get_bucket(bucket_name)
+        `precondition` is checked against the object before its data is
+        opened, and may raise; if it returns true, the data is None.
+        """
 
-        for path, dirs, files in self.fs.walk():
-            path = pathlib.Path(path)
+        bucket = self._head_bucket(bucket_name)
 
-            for file in files:
-                object_key = str(path.joinpath(file.name))
+        while True:
+            with self.service.commit_lock:
+                record = self.service.metadata.get(bucket_name, object_key)
 
-                file_details = self.fs.getdetails(object_key)
+                if record is not None:
+                    object = self._object(bucket, object_key, record)
 
-                object = models.Object \
-                (
-                    key                = object_key,
-                    bucket             = bucket,
-                    last_modified_date = file_details.modified,
-                )
+                    if precondition is not None and precondition(object):
+                        return object, None
+
+                    return object, self._open(bucket_name, object_key, record)
+
+            # Objects from before the metadata store are hashed without it
+            if self._backfill(bucket_name, object_key) is None:
+                raise exceptions.S3Error("NoSuchKey")
+
+    def list_objects(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        start_after: str = "",
+        delimiter: str = None,
+        **kwargs,
+    ):
+        """Yields objects and common prefixes in key order, beginning after `start_after`."""
+
+        bucket = self._get_owned_bucket(bucket_name)
+
+        if bucket is None:
+            raise exceptions.S3Error("NoSuchBucket")
+
+        entries = self._index(bucket_name).scan(
+            prefix=prefix, start_after=start_after, delimiter=delimiter
+        )
+
+        while batch := list(itertools.islice(entries, self.list_batch_size)):
+            records = self.service.metadata.get_many(
+                bucket_name,
+                (name for name, is_common_prefix in batch if not is_common_prefix),
+            )
+
+            for name, is_common_prefix in batch:
+                if is_common_prefix:
+                    yield models.CommonPrefix(prefix=name)
 
-                yield object
-    """
+                    continue
+
+                record = records.get(name) or self._backfill(bucket_name, name)
+
+                if record is not None:
+                    yield self._object(bucket, name, record)
 
     def delete_object(self, bucket_name: str, object_key: str, **kwargs):
-        self.head_bucket(bucket_name)
+        self._head_bucket(bucket_name)
 
-        if self._object_exists(bucket_name, object_key):
-            path = pathlib.Path(bucket_name).joinpath(object_key)
+        path = self.service.layout.path(bucket_name, object_key)
+
+        with self.service.commit_lock:
+            record = self.service.metadata.get(bucket_name, object_key)
+            released = self.service.metadata.delete(bucket_name, object_key)
+
+            self._unmap(path)
+
+            try:
+                self.fs.remove(path)
+            except (fs.errors.ResourceNotFound, fs.errors.FileExpected):
+                removed = False
+            else:
+                removed = True
+
+        self._release(released)
+
+        # Packed objects have no file to remove, their segment is compacted
+        if removed or (record is not None and record.segment is not None):
+            self.service.index.discard(bucket_name, object_key)
+
+        if removed:
+            self._prune(bucket_name, (object_key,))
+
+    def delete_objects(self, bucket_name: str, object_keys: List[str], **kwargs):
+        """Deletes a batch of objects, returning deleted keys and (key, error) pairs
+
+        The batch's metadata is forgotten in one transaction, and directories
+        the batch leaves empty are pruned once for all of it. Keys that can't
+        name an object are errors of their own, and don't fail the batch.
+        """
+
+        self._head_bucket(bucket_name)
+
+        if not object_keys or len(object_keys) > self.max_delete_keys:
+            raise exceptions.S3Error("MalformedXML")
+
+        deleted = []
+        removed = []
+        errors = []
+        paths = {}
+
+        for object_key in dict.fromkeys(object_keys):
+            try:
+                paths[object_key] = self._key_path(bucket_name, object_key)
+            except exceptions.S3Error as error:
+                errors.append((object_key, error.code))
+
+        object_keys = list(paths)
+
+        with self.service.commit_lock:
+            records = self.service.metadata.get_many(bucket_name, object_keys)
+            released = self.service.metadata.delete_many(bucket_name, object_keys)
+
+            for object_key, path in paths.items():
+                self._unmap(path)
+
+                try:
+                    self.fs.remove(path)
+                except (fs.errors.ResourceNotFound, fs.errors.FileExpected):
+                    pass
+                except fs.errors.FSError:
+                    errors.append((object_key, "InternalError"))
 
-            if self.fs.isfile(str(path)):
-                self.fs.remove(str(path))
+                    continue
+                else:
+                    removed.append(object_key)
 
-            for parent in map(str, list(path.parents)[:-2]):
-                if self.fs.isempty(parent):
-                    self.fs.removedir(parent)
+                deleted.append(object_key)
+
+        for manifest in released:
+            self._release(manifest)
+
+        packed = [key for key, record in records.items() if record.segment is not None]
+
+        for object_key in itertools.chain(removed, packed):
+            self.service.index.discard(bucket_name, object_key)
+
+        self._prune(bucket_name, removed)
+
+        return deleted, errors
 
     def head_object(self, bucket_name: str, object_key: str, **kwargs):
-        self.head_bucket(bucket_name)
+        return self._head_object(bucket_name, object_key)
 
-        if not self._object_exists(bucket_name, object_key):
-            raise exceptions.S3Error("NoSuchKey")
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        source_bucket_name: str,
+        source_object_key: str,
+        metadata_directive: str = "COPY",
+        content_type: str = None,
+        metadata: Dict[str, str] = None,
+        precondition: Callable[[models.Object], bool] = None,
+        **kwargs,
+    ):
+        """Copies an object server-side, keeping its ETag
+
+        The copy is a reflink where the filesystem supports them, and otherwise
+        moved by the kernel; the data is never hashed again. `precondition`
+        is checked against the source, as for `open_object`, and must raise
+        to stop the copy.
+        """
+
+        bucket = self._head_bucket(bucket_name)
+        source, file = self.open_object(
+            source_bucket_name, source_object_key, precondition=precondition
+        )
+
+        with file:
+            return self._copy_object(
+                bucket,
+                object_key,
+                source,
+                file,
+                metadata_directive,
+                content_type,
+                metadata,
+            )
+
+    def _copy_object(
+        self,
+        bucket: models.Bucket,
+        object_key: str,
+        source: models.Object,
+        file,
+        metadata_directive: str,
+        content_type: Optional[str],
+        metadata: Optional[Dict[str, str]],
+    ):
+        bucket_name = bucket.name
+
+        if metadata_directive == "REPLACE":
+            content_type = (
+                content_type
+                or content_types.from_extension(object_key)
+                or source.content_type
+            )
+            metadata = metadata or {}
+        else:
+            content_type = source.content_type
+            metadata = source.metadata
+
+        if (bucket_name, object_key) == (source.bucket.name, source.key):
+            # Copying onto itself can only ever rewrite the metadata
+            if metadata_directive != "REPLACE":
+                raise exceptions.S3Error("InvalidRequest")
+
+            with self.service.commit_lock:
+                record = self.service.metadata.get(bucket_name, object_key)
+
+                if record is None:
+                    raise exceptions.S3Error("NoSuchKey")
+
+                record = record._replace(
+                    last_modified=time.time(),
+                    content_type=content_type,
+                    metadata=metadata,
+                )
+
+                self.service.metadata.put(bucket_name, object_key, record)
+
+            return self._object(bucket, object_key, record)
+
+        record = Metadata(
+            size=source.size,
+            last_modified=time.time(),
+            etag=source.etag,
+            content_type=content_type,
+            metadata=metadata,
+        )
+
+        if self.service.pack_size and source.size <= self.service.pack_size:
+            data = b"".join(files.read(file, 0, source.size, self.service.chunk_size))
+
+            record, released = self._pack(bucket_name, object_key, data, record)
+
+            self.service.index.add(bucket_name, object_key)
+
+            self._release(released)
+
+            return self._object(bucket, object_key, record)
+
+        path = self.service.layout.prepare(bucket_name, object_key)
+
+        try:
+            with self._temporary() as (destination, temp_path):
+                if not files.clone(file, destination):
+                    self._copy(file, destination, 0, source.size)
+
+            released = self._install(
+                temp_path,
+                path,
+                lambda: self.service.metadata.put(bucket_name, object_key, record),
+                bucket_name,
+            )
+        except BaseException:
+            self._prune(bucket_name, (object_key,))
+
+            raise
+
+        self.service.index.add(bucket_name, object_key)
+
+        self._release(released)
+
+        return self._object(bucket, object_key, record)
+
+    def create_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        content_type: str = None,
+        metadata: Dict[str, str] = None,
+        **kwargs,
+    ):
+        bucket = self._head_bucket(bucket_name)
+
+        upload_id = utils.hex_token(16)
+        initiated = time.time()
+
+        self.fs.makedir(self._upload_path(upload_id))
+
+        self.service.metadata.create_upload(
+            upload_id,
+            Upload(
+                bucket=bucket_name,
+                key=object_key,
+                initiated=initiated,
+                content_type=content_type,
+                metadata=metadata or {},
+            ),
+        )
+
+        return models.MultipartUpload(
+            upload_id=upload_id,
+            key=object_key,
+            bucket=bucket,
+            initiated_date=datetime.datetime.fromtimestamp(
+                initiated, datetime.timezone.utc
+            ),
+        )
+
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        object_data: Union[bytes, Iterable[bytes]],
+        content_md5: str = None,
+        **kwargs,
+    ):
+        self._head_bucket(bucket_name)
+
+        if not 1 <= part_number <= self.max_part_number:
+            raise exceptions.S3Error("InvalidArgument")
+
+        self._get_upload(bucket_name, object_key, upload_id)
+
+        expected_digest = None
+
+        if content_md5 is not None:
+            expected_digest = etags.decode_content_md5(content_md5)
+
+        temp_path, size, hasher, _ = self._write(object_data, expected_digest)
+
+        part = Part(
+            part_number=part_number,
+            size=size,
+            etag=hasher.hexdigest(),
+            last_modified=time.time(),
+        )
+
+        self._install(
+            temp_path,
+            self._upload_path(upload_id, part_number),
+            lambda: self.service.metadata.put_part(upload_id, part),
+            upload_id=upload_id,
+        )
+
+        return self._part(part)
+
+    def upload_part_copy(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        source_bucket_name: str,
+        source_object_key: str,
+        byte_range: Tuple[int, int] = None,
+        precondition: Callable[[models.Object], bool] = None,
+        **kwargs,
+    ):
+        """Uploads a part copied from another object, or an inclusive range of it
+
+        The range is read once, server-side, to compute the part's ETag.
+        `precondition` is checked against the source, as for `copy_object`.
+        """
+
+        self._head_bucket(bucket_name)
+
+        if not 1 <= part_number <= self.max_part_number:
+            raise exceptions.S3Error("InvalidArgument")
+
+        self._get_upload(bucket_name, object_key, upload_id)
+
+        source, file = self.open_object(
+            source_bucket_name, source_object_key, precondition=precondition
+        )
+
+        with file:
+            start, end = byte_range or (0, source.size - 1)
+
+            if byte_range is not None and end >= source.size:
+                raise exceptions.S3Error("InvalidRange")
+
+            temp_path, size, hasher, _ = self._write(
+                files.read(file, start, end - start + 1, self.service.chunk_size)
+            )
+
+        part = Part(
+            part_number=part_number,
+            size=size,
+            etag=hasher.hexdigest(),
+            last_modified=time.time(),
+        )
+
+        self._install(
+            temp_path,
+            self._upload_path(upload_id, part_number),
+            lambda: self.service.metadata.put_part(upload_id, part),
+            upload_id=upload_id,
+        )
+
+        return self._part(part)
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Tuple[int, str]],
+        **kwargs,
+    ):
+        """Assembles the listed (part number, ETag) parts into the object
+
+        With `multipart_manifests` the parts are kept where they are and the
+        object recorded as a manifest of them, rather than concatenated.
+        """
+
+        bucket = self._head_bucket(bucket_name)
+        upload = self._get_upload(bucket_name, object_key, upload_id)
+
+        if not parts:
+            raise exceptions.S3Error("MalformedXML")
+
+        part_numbers = [part_number for part_number, _ in parts]
+
+        if part_numbers != sorted(set(part_numbers)):
+            raise exceptions.S3Error("InvalidPartOrder")
+
+        uploaded = {
+            part.part_number: part
+            for part in self.service.metadata.list_parts(upload_id)
+        }
+
+        selected = []
+
+        for part_number, etag in parts:
+            part = uploaded.get(part_number)
+
+            if part is None or part.etag != etag.strip('"'):
+                raise exceptions.S3Error("InvalidPart")
+
+            selected.append(part)
+
+        if any(part.size < self.min_part_size for part in selected[:-1]):
+            raise exceptions.S3Error("EntityTooSmall")
+
+        content_type = upload.content_type or content_types.from_extension(object_key)
+
+        if content_type is None:
+            with self.fs.open(
+                self._upload_path(upload_id, part_numbers[0]), "rb"
+            ) as file:
+                content_type = content_types.from_data(
+                    file.read(content_types.SNIFF_SIZE)
+                )
+
+        path = self.service.layout.prepare(bucket_name, object_key)
+        manifest = upload_id if self.service.multipart_manifests else None
+
+        record = Metadata(
+            size=sum(part.size for part in selected),
+            last_modified=time.time(),
+            etag=etags.multipart_etag(bytes.fromhex(part.etag) for part in selected),
+            content_type=content_type,
+            metadata=upload.metadata,
+            manifest=manifest,
+        )
+
+        unused_parts = uploaded.keys() - set(part_numbers)
+
+        try:
+            # A manifest object leaves an empty file in place, for listings
+            with self._temporary() as (destination, temp_path):
+                if manifest is None:
+                    for part in selected:
+                        part_path = self._upload_path(upload_id, part.part_number)
+
+                        with self.fs.open(part_path, "rb") as source:
+                            files.copy(source, destination, self.service.chunk_size)
+
+            released = self._install(
+                temp_path,
+                path,
+                lambda: self.service.metadata.complete_upload(
+                    upload_id, bucket_name, object_key, record, unused_parts
+                ),
+                bucket_name,
+            )
+        except BaseException:
+            self._prune(bucket_name, (object_key,))
+
+            raise
+
+        self.service.index.add(bucket_name, object_key)
+
+        self._release(released)
+
+        if manifest is None:
+            self.fs.removetree(self._upload_path(upload_id))
+        else:
+            for part_number in unused_parts:
+                self.fs.remove(self._upload_path(upload_id, part_number))
+
+        return self._object(bucket, object_key, record)
+
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str, **kwargs
+    ):
+        self._head_bucket(bucket_name)
+        self._get_upload(bucket_name, object_key, upload_id)
+
+        # Parts being installed either land before this, or find it gone
+        with self.service.commit_lock:
+            self.service.metadata.delete_upload(upload_id)
+
+        if self.fs.isdir(self._upload_path(upload_id)):
+            self.fs.removetree(self._upload_path(upload_id))
+
+    def list_parts(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number_marker: int = 0,
+        **kwargs,
+    ):
+        """Yields uploaded parts in part number order, after `part_number_marker`"""
+
+        self._head_bucket(bucket_name)
+        self._get_upload(bucket_name, object_key, upload_id)
+
+        for part in self.service.metadata.list_parts(
+            upload_id, after=part_number_marker
+        ):
+            yield self._part(part)
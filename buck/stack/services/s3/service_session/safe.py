@@ -3,16 +3,17 @@ from .... import exceptions
 from . import fs
 from .. import types
 
+from typing import Iterable, List, Tuple, Union
+
 
 def catch(type, error):
-    class Wrapper(type):
-        def __init__(self, value: str):
-            if self.validate(value) is not None:
-                raise exceptions.S3Error(error)
+    def wrapper(value: str) -> str:
+        if type.validate(value) is not None:
+            raise exceptions.S3Error(error)
 
-            super().__init__(value)
+        return value
 
-    return Wrapper
+    return wrapper
 
 
 # NOTE: This current model doesn't work for specific errors, e.g. KeyTooLongError
@@ -21,66 +22,186 @@ ObjectKey = catch(types.ObjectKey, "InvalidRequest")
 
 
 class SimpleStorageServiceSession(fs.SimpleStorageServiceSession):
+    __slots__ = ()
+
     def list_buckets(self, **kwargs):
         return super().list_buckets(**kwargs)
 
     def get_bucket(self, name: str, **kwargs):
         return super().get_bucket(
-            str(BucketName(name)),
+            BucketName(name),
             **kwargs,
         )
 
     def create_bucket(self, name: str, **kwargs):
         return super().create_bucket(
-            str(BucketName(name)),
+            BucketName(name),
             **kwargs,
         )
 
     def delete_bucket(self, name: str, **kwargs):
         return super().delete_bucket(
-            str(BucketName(name)),
+            BucketName(name),
             **kwargs,
         )
 
     def head_bucket(self, name: str, **kwargs):
         return super().head_bucket(
-            str(BucketName(name)),
+            BucketName(name),
             **kwargs,
         )
 
     def put_object(
-        self, bucket_name: str, object_key: str, object_data: bytes, **kwargs
+        self,
+        bucket_name: str,
+        object_key: str,
+        object_data: Union[bytes, Iterable[bytes]],
+        **kwargs
     ):
         return super().put_object(
-            str(BucketName(bucket_name)),
-            str(ObjectKey(object_key)),
+            BucketName(bucket_name),
+            ObjectKey(object_key),
             object_data,
             **kwargs,
         )
 
     def get_object(self, bucket_name: str, object_key: str, **kwargs):
         return super().get_object(
-            str(BucketName(bucket_name)),
-            str(ObjectKey(object_key)),
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            **kwargs,
+        )
+
+    def open_object(self, bucket_name: str, object_key: str, **kwargs):
+        return super().open_object(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
             **kwargs,
         )
 
     def list_objects(self, bucket_name: str, **kwargs):
         return super().list_objects(
-            str(BucketName(bucket_name)),
+            BucketName(bucket_name),
             **kwargs,
         )
 
     def delete_object(self, bucket_name: str, object_key: str, **kwargs):
         return super().delete_object(
-            str(BucketName(bucket_name)),
-            str(ObjectKey(object_key)),
+            BucketName(bucket_name),
+            ObjectKey(object_key),
             **kwargs,
         )
 
+    def delete_objects(self, bucket_name: str, object_keys: List[str], **kwargs):
+        # Keys are validated one at a time, by `_key_path`, so that an invalid
+        # key is reported on its own rather than failing the whole batch
+        return super().delete_objects(
+            BucketName(bucket_name),
+            object_keys,
+            **kwargs,
+        )
+
+    def _key_path(self, bucket_name: str, object_key: str) -> str:
+        return super()._key_path(bucket_name, ObjectKey(object_key))
+
     def head_object(self, bucket_name: str, object_key: str, **kwargs):
         return super().head_object(
-            str(BucketName(bucket_name)),
-            str(ObjectKey(object_key)),
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            **kwargs,
+        )
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        source_bucket_name: str,
+        source_object_key: str,
+        **kwargs
+    ):
+        return super().copy_object(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            BucketName(source_bucket_name),
+            ObjectKey(source_object_key),
+            **kwargs,
+        )
+
+    def create_multipart_upload(self, bucket_name: str, object_key: str, **kwargs):
+        return super().create_multipart_upload(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            **kwargs,
+        )
+
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        object_data: Union[bytes, Iterable[bytes]],
+        **kwargs
+    ):
+        return super().upload_part(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            upload_id,
+            part_number,
+            object_data,
+            **kwargs,
+        )
+
+    def upload_part_copy(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        source_bucket_name: str,
+        source_object_key: str,
+        **kwargs
+    ):
+        return super().upload_part_copy(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            upload_id,
+            part_number,
+            BucketName(source_bucket_name),
+            ObjectKey(source_object_key),
+            **kwargs,
+        )
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Tuple[int, str]],
+        **kwargs
+    ):
+        return super().complete_multipart_upload(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            upload_id,
+            parts,
+            **kwargs,
+        )
+
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str, **kwargs
+    ):
+        return super().abort_multipart_upload(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            upload_id,
+            **kwargs,
+        )
+
+    def list_parts(self, bucket_name: str, object_key: str, upload_id: str, **kwargs):
+        return super().list_parts(
+            BucketName(bucket_name),
+            ObjectKey(object_key),
+            upload_id,
             **kwargs,
         )
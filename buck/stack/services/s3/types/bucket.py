@@ -1,43 +1,53 @@
 from . import base
 
+import functools
 import string
 import re
 
+LEN_MIN = 3
+LEN_MAX = 63
+ACCEPTABLE_CHARS = f"{string.ascii_lowercase}{string.digits}.-"
+ACCEPTABLE_END_CHARS = f"{string.ascii_lowercase}{string.digits}"
+ACCEPTABLE_CHARS_PATTERN = re.compile(r"[a-z0-9.\-]*")
+ACCEPTABLE_END_CHARS_SET = frozenset(ACCEPTABLE_END_CHARS)
+UNACCEPTABLE_FORMATS = {
+    "an IP address": re.compile(r"(\d)\.(\d)\.(\d)\.(\d)"),
+}
+UNACCEPTABLE_STARTS = ("xn--",)
+CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def validate(value: str):
+    # Rules for s3 bucket naming: (https://docs.aws.amazon.com/AmazonS3/latest/dev/BucketRestrictions.html#bucketnamingrules)
+    #   * Bucket names must be between 3 and 63 characters long.
+    #   * Bucket names can consist only of lowercase letters, numbers, dots (.), and hyphens (-).
+    #   * Bucket names must begin and end with a letter or number.
+    #   * Bucket names must not be formatted as an IP address (for example, 192.168.5.4).
+    #   * Bucket names can't begin with xn-- (for buckets created after February 2020).
+
+    if not LEN_MIN <= len(value) <= LEN_MAX:
+        return f"must be between {LEN_MIN} and {LEN_MAX} characters long"
+
+    if not ACCEPTABLE_CHARS_PATTERN.fullmatch(value):
+        return f"can consist only of characters: {ACCEPTABLE_CHARS!r}"
+
+    if (
+        value[0] not in ACCEPTABLE_END_CHARS_SET
+        or value[-1] not in ACCEPTABLE_END_CHARS_SET
+    ):
+        return f"first and last char must be in: {ACCEPTABLE_END_CHARS!r}"
+
+    for format_name, format_pattern in UNACCEPTABLE_FORMATS.items():
+        if format_pattern.match(value):
+            return f"must not be formatted as {format_name}"
+
+    for unacceptable_start in UNACCEPTABLE_STARTS:
+        if value.startswith(unacceptable_start):
+            return f"can't begin with the character: {unacceptable_start!r}"
+
 
 class BucketName(base.BaseType):
     @staticmethod
     def validate(value: str):
-        # Rules for s3 bucket naming: (https://docs.aws.amazon.com/AmazonS3/latest/dev/BucketRestrictions.html#bucketnamingrules)
-        #   * Bucket names must be between 3 and 63 characters long.
-        #   * Bucket names can consist only of lowercase letters, numbers, dots (.), and hyphens (-).
-        #   * Bucket names must begin and end with a letter or number.
-        #   * Bucket names must not be formatted as an IP address (for example, 192.168.5.4).
-        #   * Bucket names can't begin with xn-- (for buckets created after February 2020).
-
-        len_min = 3
-        len_max = 63
-        acceptable_chars = f"{string.ascii_lowercase}{string.digits}.-"
-        acceptable_end_chars = f"{string.ascii_lowercase}{string.digits}"
-        unacceptable_formats = {
-            "an IP address": r"(\d)\.(\d)\.(\d)\.(\d)",
-        }
-        unacceptable_starts = ("xn--",)
-
-        if not len_min <= len(value) <= len_max:
-            return f"must be between {len_min} and {len_max} characters long"
-
-        for char in value:
-            if char not in acceptable_chars:
-                return f"can consist only of characters: {acceptable_chars!r}"
-
-        for char in (value[0], value[-1]):
-            if char not in acceptable_end_chars:
-                return f"first and last char must be in: {acceptable_end_chars!r}"
-
-        for format_name, format_pattern in unacceptable_formats.items():
-            if re.match(format_pattern, value):
-                return f"must not be formatted as {format_name}"
-
-        for unacceptable_start in unacceptable_starts:
-            if value.startswith(unacceptable_start):
-                return f"can't begin with the character: {unacceptable_start!r}"
+        return validate(str(value))
@@ -1,31 +1,36 @@
 from . import base
 
 import string
+import re
+
+ACCEPTABLE_CHARS = f"{string.ascii_letters}{string.digits}/!-_.*'()"
+UNACCEPTABLE_CHAR_PATTERN = re.compile(r"[^A-Za-z0-9/!\-_.*'()]")
+
+
+def validate(value: str):
+    # Safe object key chars: (https://docs.aws.amazon.com/AmazonS3/latest/dev/UsingMetadata.html#object-key-guidelines-safe-characters)
+    #     * Alphanumeric characters:
+    #         * 0-9
+    #         * a-z
+    #         * A-Z
+    #     * Special characters:
+    #         * Forward slash (/)
+    #         * Exclamation point (!)
+    #         * Hyphen (-)
+    #         * Underscore (_)
+    #         * Period (.)
+    #         * Asterisk (*)
+    #         * Single quote (')
+    #         * Open parenthesis (()
+    #         * Close parenthesis ())
+
+    match = UNACCEPTABLE_CHAR_PATTERN.search(value)
+
+    if match is not None:
+        return f"Unsafe character: {match.group()!r}"
 
 
 class ObjectKey(base.BaseType):
     @staticmethod
     def validate(value: str):
-        # Safe object key chars: (https://docs.aws.amazon.com/AmazonS3/latest/dev/UsingMetadata.html#object-key-guidelines-safe-characters)
-        #     * Alphanumeric characters:
-        #         * 0-9
-        #         * a-z
-        #         * A-Z
-        #     * Special characters:
-        #         * Forward slash (/)
-        #         * Exclamation point (!)
-        #         * Hyphen (-)
-        #         * Underscore (_)
-        #         * Period (.)
-        #         * Asterisk (*)
-        #         * Single quote (')
-        #         * Open parenthesis (()
-        #         * Close parenthesis ())
-
-        value = str(value)
-
-        acceptable_chars = f"{string.ascii_letters}{string.digits}/!-_.*'()"
-
-        for char in value:
-            if char not in acceptable_chars:
-                return f"Unsafe character: {char!r}"
+        return validate(str(value))
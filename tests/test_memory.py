@@ -0,0 +1,20 @@
+from buck.api import api
+
+import fastapi.testclient
+
+
+def test_put_and_get_in_memory():
+    with fastapi.testclient.TestClient(api()) as client:
+        assert client.put("/bucket").ok
+
+        response = client.put("/bucket/dir/key", data=b"data")
+
+        assert response.status_code == 200
+
+        response = client.get("/bucket/dir/key")
+
+        assert response.status_code == 200
+        assert response.content == b"data"
+
+        assert client.put("/bucket/dir/key", data=b"more data").status_code == 200
+        assert client.get("/bucket/dir/key").content == b"more data"